@@ -0,0 +1,48 @@
+import heapq
+import itertools
+import time
+
+
+class ActionScheduler:
+    """
+    Queue of delayed actions keyed on monotonic time. The main loop drains
+    it every frame with run_due(), so nothing ever sleeps the thread.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.queue = []
+        self.counter = itertools.count()
+
+    def schedule(self, delay, action, *args):
+        """Run action(*args) once `delay` seconds have passed. Returns a handle for cancel()."""
+        entry = [self.clock() + delay, next(self.counter), action, args, True]
+        heapq.heappush(self.queue, entry)
+        return entry
+
+    def cancel(self, entry):
+        entry[4] = False
+
+    def clear(self):
+        self.queue = []
+
+    def time_until_next(self):
+        """Seconds until the next live action is due, or None if the queue is empty."""
+        while self.queue and not self.queue[0][4]:
+            heapq.heappop(self.queue)
+        if not self.queue:
+            return None
+        return max(0.0, self.queue[0][0] - self.clock())
+
+    def run_due(self):
+        now = self.clock()
+        ran = 0
+        while self.queue and self.queue[0][0] <= now:
+            _, _, action, args, live = heapq.heappop(self.queue)
+            if live:
+                action(*args)
+                ran += 1
+        return ran
+
+    def __len__(self):
+        return sum(1 for entry in self.queue if entry[4])
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+
+import pygame
+
+
+def estimate_size(asset):
+    """Approximate resident bytes for a loaded asset."""
+    if isinstance(asset, pygame.Surface):
+        # Subsurfaces share their parent's pixels, which are counted with the parent
+        if asset.get_parent() is not None:
+            return 0
+        return asset.get_width() * asset.get_height() * asset.get_bytesize()
+    if isinstance(asset, pygame.mixer.Sound):
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        return int(asset.get_length() * frequency * channels * abs(sample_format) // 8)
+    if isinstance(asset, dict):
+        parents = {id(s.get_parent()): s.get_parent() for s in asset.values() if isinstance(s, pygame.Surface)}
+        return sum(estimate_size(p) for p in parents.values() if p is not None)
+    return 0
+
+
+class AssetManager:
+    """
+    Loads sprites and sounds on first use and keeps them in an LRU bounded
+    by an approximate byte budget. Pinned assets are never evicted; pins are
+    reference counted so several users can hold the same asset.
+    """
+
+    def __init__(self, budget_bytes=32 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.loaders = {}
+        self.assets = OrderedDict()
+        self.sizes = {}
+        self.pins = {}
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register(self, name, loader):
+        """Register a zero-argument callable that loads the asset called name."""
+        self.loaders[name] = loader
+
+    def get(self, name):
+        if name in self.assets:
+            self.assets.move_to_end(name)
+            self.hits += 1
+            return self.assets[name]
+        self.misses += 1
+        asset = self.loaders[name]()
+        size = estimate_size(asset)
+        self.assets[name] = asset
+        self.sizes[name] = size
+        self.used_bytes += size
+        self.evict_to_budget()
+        return asset
+
+    def pin(self, name):
+        self.pins[name] = self.pins.get(name, 0) + 1
+
+    def unpin(self, name):
+        count = self.pins.get(name, 0) - 1
+        if count > 0:
+            self.pins[name] = count
+        else:
+            self.pins.pop(name, None)
+
+    def evict_to_budget(self):
+        if self.used_bytes <= self.budget_bytes:
+            return
+        for name in list(self.assets):
+            if self.used_bytes <= self.budget_bytes:
+                break
+            if name in self.pins:
+                continue
+            del self.assets[name]
+            self.used_bytes -= self.sizes.pop(name)
+            self.evictions += 1
+
+    def unload(self, name):
+        """Forget a loaded asset so the next get() calls its loader again."""
+        if name in self.assets:
+            del self.assets[name]
+            self.used_bytes -= self.sizes.pop(name)
+
+    def release_unpinned(self):
+        """Drop every loaded asset that nothing has pinned."""
+        budget = self.budget_bytes
+        self.budget_bytes = 0
+        self.evict_to_budget()
+        self.budget_bytes = budget
+
+    def stats(self):
+        return {
+            "loaded": len(self.assets),
+            "pinned": len(self.pins),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class AssetView:
+    """Read-only dict-style access to the assets registered under a name prefix."""
+
+    def __init__(self, manager, prefix):
+        self.manager = manager
+        self.prefix = prefix
+
+    def __getitem__(self, name):
+        key = self.prefix + name
+        if key not in self.manager.loaders:
+            raise KeyError(name)
+        return self.manager.get(key)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        return self.prefix + name in self.manager.loaders
+
+    def keys(self):
+        return [key[len(self.prefix):] for key in self.manager.loaders if key.startswith(self.prefix)]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Texture atlas build step.
+
+    python atlas.py
+
+packs every sprite the game references (SPRITE_FILES in rpg_pygame.py)
+and the golden UI elements into assets/atlas/, one PNG plus a JSON index
+per atlas. When an atlas is present the game serves its sprites as
+subsurfaces of that single image instead of loading each file; rerun the
+command after changing the sprite tables.
+"""
+import json
+import os
+
+import pygame
+
+ATLAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "atlas")
+ATLAS_VERSION = 1
+
+
+def pack(images, max_width=1024, padding=1):
+    """
+    Shelf-pack named surfaces into one image, tallest first.
+    Returns (surface, {name: (x, y, w, h)}).
+    """
+    max_width = max([max_width] + [image.get_width() for image in images.values()])
+    order = sorted(images, key=lambda name: (-images[name].get_height(), name))
+    rects = {}
+    x = y = shelf_height = used_width = 0
+    for name in order:
+        w, h = images[name].get_size()
+        if x and x + w > max_width:
+            y += shelf_height + padding
+            x = shelf_height = 0
+        rects[name] = (x, y, w, h)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+        used_width = max(used_width, x - padding)
+
+    sheet = pygame.Surface((max(1, used_width), max(1, y + shelf_height)), pygame.SRCALPHA)
+    sheet.fill((0, 0, 0, 0))
+    for name, (x, y, w, h) in rects.items():
+        # RGBA_MAX onto a cleared sheet copies pixels exactly instead of alpha-blending them
+        sheet.blit(images[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+    return sheet, rects
+
+
+def save_atlas(name, sheet, rects):
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    pygame.image.save(sheet, os.path.join(ATLAS_DIR, name + ".png"))
+    index = {"version": ATLAS_VERSION, "image": name + ".png", "sprites": {n: list(r) for n, r in sorted(rects.items())}}
+    with open(os.path.join(ATLAS_DIR, name + ".json"), "w") as f:
+        json.dump(index, f, indent=1)
+
+
+def load_atlas(name):
+    """
+    Load a built atlas and return {sprite name: subsurface}, or None if the
+    atlas has not been built. Subsurfaces share the atlas pixels, so the
+    whole sheet costs one file read and one convert_alpha.
+    """
+    index_path = os.path.join(ATLAS_DIR, name + ".json")
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if index.get("version") != ATLAS_VERSION:
+            return None
+        sheet = pygame.image.load(os.path.join(ATLAS_DIR, index["image"])).convert_alpha()
+    except (OSError, ValueError, KeyError, pygame.error):
+        print(f"Warning: Could not load atlas '{name}'. Loading sprites individually.")
+        return None
+    return {n: sheet.subsurface(pygame.Rect(r)) for n, r in index["sprites"].items()}
+
+
+def load_image(path, size=None, scale=1):
+    image = pygame.image.load(path).convert_alpha()
+    if size:
+        image = pygame.transform.scale(image, size)
+    elif scale != 1:
+        w, h = image.get_size()
+        image = pygame.transform.scale(image, (w * scale, h * scale))
+    return image
+
+
+def main():
+    os.environ["RPG_HEADLESS"] = "1"
+    import rpg_pygame as rpg
+    from golden_ui_loader import UI_MAP, ui_atlas_name
+
+    rpg.startup()
+    pygame.display.set_mode((1, 1))
+
+    sprites = {}
+    for name, path in rpg.SPRITE_FILES.items():
+        full_path = os.path.join(rpg.script_dir, rpg.SPRITE_PATH, path)
+        try:
+            sprites[name] = load_image(full_path, size=(rpg.TILE_SIZE, rpg.TILE_SIZE))
+        except (pygame.error, FileNotFoundError):
+            print(f"Error: Cannot load sprite '{path}', leaving it out of the atlas.")
+    sheet, rects = pack(sprites)
+    save_atlas(rpg.SPRITE_ATLAS, sheet, rects)
+    print(f"{rpg.SPRITE_ATLAS}: {len(rects)} sprites, {sheet.get_width()}x{sheet.get_height()}")
+
+    ui_folder = os.path.join(rpg.script_dir, "ui_elements")
+    scale = 2
+    elements = {}
+    for key, name in UI_MAP.items():
+        path = os.path.join(ui_folder, key + ".png")
+        if os.path.exists(path):
+            elements[name] = load_image(path, scale=scale)
+    sheet, rects = pack(elements)
+    save_atlas(ui_atlas_name(ui_folder, scale), sheet, rects)
+    print(f"{ui_atlas_name(ui_folder, scale)}: {len(rects)} elements, {sheet.get_width()}x{sheet.get_height()}")
+
+
+if __name__ == "__main__":
+    main()
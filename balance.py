@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Balance sweep: plays many complete seeded games across a pool of worker
+processes and reports how runs go, for tuning CLASSES, ENEMIES, WEAPONS,
+ARMOR and the level-up growth numbers.
+
+    python balance.py --runs 100000 --workers 8 --seed 0 --out balance.json
+
+Run i plays seed + i with the i-th party in a fixed rotation of class mixes,
+so the same arguments give the same report whatever the worker count.
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+import simulate
+import rpg_pygame as rpg
+
+CHUNK_RUNS = 50 # Games per task handed to a worker
+OUTCOMES = ("won", "dead", "timeout")
+
+
+def class_mixes(players):
+    """Every party of this size, ignoring order."""
+    return [list(mix) for mix in itertools.combinations_with_replacement(sorted(rpg.CLASSES), players)]
+
+
+class BalanceTally:
+    """
+    Running totals over finished games. Only counts are kept, so tallies
+    from different workers merge in any order to the same result.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.outcomes = Counter()
+        self.mixes = {} # "mage+warrior" -> Counter of outcomes
+        self.deaths_by_level = Counter()
+        self.turns = {outcome: Counter() for outcome in OUTCOMES}
+        # Per dungeon level: parties that reached it and sums over them on arrival
+        self.arrivals = Counter()
+        self.arrival_turns = Counter()
+        self.arrival_hero_levels = Counter()
+        self.arrival_xp = Counter()
+        self.heroes = Counter()
+
+    def add(self, result):
+        outcome = result["outcome"]
+        self.runs += 1
+        self.outcomes[outcome] += 1
+        self.mixes.setdefault("+".join(sorted(result["classes"])), Counter())[outcome] += 1
+        if outcome == "dead":
+            self.deaths_by_level[result["level"]] += 1
+        self.turns[outcome][result["turns"]] += 1
+        for entry in result["levels"]:
+            level = entry["level"]
+            self.arrivals[level] += 1
+            self.arrival_turns[level] += entry["turn"]
+            self.arrival_hero_levels[level] += sum(entry["party_levels"])
+            self.arrival_xp[level] += entry["xp"]
+            self.heroes[level] += len(entry["party_levels"])
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.outcomes.update(other.outcomes)
+        for mix, outcomes in other.mixes.items():
+            self.mixes.setdefault(mix, Counter()).update(outcomes)
+        self.deaths_by_level.update(other.deaths_by_level)
+        for outcome in OUTCOMES:
+            self.turns[outcome].update(other.turns[outcome])
+        for name in ("arrivals", "arrival_turns", "arrival_hero_levels", "arrival_xp", "heroes"):
+            getattr(self, name).update(getattr(other, name))
+
+    def report(self):
+        """The aggregate statistics as a JSON-ready dict."""
+        mixes = {}
+        for mix in sorted(self.mixes):
+            counts = self.mixes[mix]
+            runs = sum(counts.values())
+            mixes[mix] = {"runs": runs, "win_rate": counts["won"] / runs,
+                          **{outcome: counts[outcome] for outcome in OUTCOMES}}
+        levels = {}
+        for level in sorted(self.arrivals):
+            arrivals = self.arrivals[level]
+            levels[level] = {
+                "reached": arrivals,
+                "deaths": self.deaths_by_level[level],
+                "mean_turn": self.arrival_turns[level] / arrivals,
+                "mean_hero_level": self.arrival_hero_levels[level] / self.heroes[level],
+                "mean_banked_xp": self.arrival_xp[level] / arrivals,
+            }
+        all_turns = Counter()
+        for counts in self.turns.values():
+            all_turns.update(counts)
+        return {
+            "runs": self.runs,
+            "outcomes": {outcome: self.outcomes[outcome] for outcome in OUTCOMES},
+            "win_rate": self.outcomes["won"] / max(1, self.runs),
+            "mixes": mixes,
+            "levels": levels,
+            "run_turns": {"all": turn_summary(all_turns),
+                          **{outcome: turn_summary(self.turns[outcome]) for outcome in OUTCOMES}},
+        }
+
+
+def turn_summary(counts):
+    # Mean and percentiles of a Counter of run lengths
+    runs = sum(counts.values())
+    if not runs:
+        return {"runs": 0}
+    summary = {"runs": runs, "mean": sum(turns * n for turns, n in counts.items()) / runs}
+    ordered = sorted(counts.items())
+    for name, share in (("p10", 0.1), ("p50", 0.5), ("p90", 0.9)):
+        target = share * (runs - 1)
+        seen = 0
+        for turns, n in ordered:
+            seen += n
+            if seen > target:
+                summary[name] = turns
+                break
+    return summary
+
+
+def run_chunk(task):
+    """Play runs [start, stop) of a sweep in this process and return their tally."""
+    seed, start, stop, mixes, policy, max_turns = task
+    tally = BalanceTally()
+    for i in range(start, stop):
+        tally.add(simulate.run_game(seed + i, mixes[i % len(mixes)], policy, max_turns))
+    return tally
+
+
+def run_sweep(runs, workers, seed=0, players=3, policy="scripted", max_turns=2000, progress=None):
+    """
+    Play runs games split across worker processes and return the merged
+    BalanceTally. progress, if given, is called with the number of games
+    finished so far after each chunk.
+    """
+    mixes = class_mixes(players)
+    tasks = [(seed, start, min(start + CHUNK_RUNS, runs), mixes, policy, max_turns)
+             for start in range(0, runs, CHUNK_RUNS)]
+    tally = BalanceTally()
+    # One worker plays in this process, which keeps profiling and debugging simple
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        for chunk in (pool.imap_unordered(run_chunk, tasks) if pool else map(run_chunk, tasks)):
+            tally.merge(chunk)
+            if progress:
+                progress(tally.runs)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return tally
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many seeded games in parallel and report balance statistics.")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--players", type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument("--policy", choices=sorted(simulate.POLICIES), default="scripted")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=2000)
+    parser.add_argument("--out", help="write the full statistics to this JSON file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done):
+        print(f"\r{done}/{args.runs} runs", end="", flush=True)
+
+    tally = run_sweep(args.runs, args.workers, args.seed, args.players, args.policy, args.max_turns, progress)
+    elapsed = time.perf_counter() - start
+    report = tally.report()
+    print(f"\rPlayed {args.runs} games on {args.workers} workers in {elapsed:.1f}s "
+          f"({args.runs / elapsed * 60:.0f} games/min)")
+    print(f"Won: {report['outcomes']['won']}  Died: {report['outcomes']['dead']}  "
+          f"Timed out: {report['outcomes']['timeout']}")
+    print("Win rate by party:")
+    for mix, stats in report["mixes"].items():
+        print(f"  {mix:<24}{stats['win_rate']:7.1%} of {stats['runs']}")
+    print("By dungeon level:")
+    for level, stats in report["levels"].items():
+        print(f"  level {level}: reached {stats['reached']}, died {stats['deaths']}, "
+              f"arrived on turn {stats['mean_turn']:.0f} at hero level {stats['mean_hero_level']:.1f}")
+    turns = report["run_turns"]["all"]
+    if turns["runs"]:
+        print(f"Run length: mean {turns['mean']:.0f} turns, p10 {turns['p10']}, p50 {turns['p50']}, p90 {turns['p90']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
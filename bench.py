@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+Performance benchmarks for level generation, drawing, movement, text,
+asset loading and save games, run under SDL's dummy video driver.
+
+    python bench.py run --out bench_results.json
+    python bench.py compare bench_baseline.json bench_results.json --threshold 0.10
+
+compare exits with status 1 if any benchmark got slower than its threshold
+allows, so it can gate a CI job.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import rpg_pygame as rpg
+from golden_ui_loader import clear_ui_cache, load_ui_elements
+from save_game import decode_snapshot, encode_snapshot
+from text_cache import render_text
+
+MIN_SAMPLE_SECONDS = 0.05 # Calls per sample are raised until one sample takes at least this long
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10 # Fractional slowdown of the median that counts as a regression
+CROWD_SIZE = 1000 # Enemies on the level for the movement benchmarks
+
+
+# --- Setup ---
+def bench_game(width=rpg.MAP_WIDTH, height=rpg.MAP_HEIGHT, enemies=None, seed=1):
+    """A Game in the playing state on a seeded level, optionally refilled with this many enemies."""
+    game = rpg.Game()
+    game.PREGENERATE_LEVELS = False
+    game.run_seed = seed
+    game.players = [rpg.Player(0, 0, f"Hero {i + 1}", c) for i, c in enumerate(rpg.CLASSES)]
+    game.num_players = len(game.players)
+    dungeon = rpg.Dungeon(width, height, 1, f"bench:{seed}")
+    dungeon.generate()
+    if enemies is not None:
+        # Open the level up so the crowd has room to move
+        for y in range(1, height - 1):
+            dungeon.fill_row(1, width - 2, y, rpg.TILE_FLOOR)
+        dungeon.revision += 1
+        for enemy in list(dungeon.enemies):
+            dungeon.remove_enemy(enemy)
+        rng = random.Random(seed)
+        start_x, start_y = dungeon.rooms[0].center()
+        while len(dungeon.enemies) < enemies:
+            x, y = rng.randrange(1, width - 1), rng.randrange(1, height - 1)
+            if abs(x - start_x) + abs(y - start_y) > 2 and not dungeon.entities_at(x, y):
+                dungeon.add_enemy(rpg.Enemy(x, y, rng.choice(rpg.SPAWNABLE_ENEMIES)))
+    game.level_pregen.take = lambda level, seed: dungeon
+    game.new_level()
+    game.game_state = "playing"
+    return game
+
+
+def pacing(game):
+    """Move the first hero one step and back on alternate calls."""
+    player = game.players[0]
+    dungeon = game.dungeon
+    for direction, (dx, dy) in (("d", (1, 0)), ("a", (-1, 0)), ("s", (0, 1)), ("w", (0, -1))):
+        x, y = player.x + dx, player.y + dy
+        if dungeon.tile_at(x, y) == rpg.TILE_FLOOR and not dungeon.entities_at(x, y):
+            break
+    back = {"d": "a", "a": "d", "s": "w", "w": "s"}[direction]
+    steps = [direction, back]
+
+    def step():
+        steps.reverse()
+        game.move_player(player, steps[0])
+    return step
+
+
+# --- Benchmarks ---
+# Each setup function returns the callable to time
+def generate(width, height):
+    seeds = iter(range(10 ** 9))
+    return lambda: rpg.Dungeon(width, height, 1, f"bench:{next(seeds)}").generate()
+
+
+def draw_game_full():
+    game = bench_game()
+
+    def frame():
+        game.renderer.invalidate()
+        game.draw_game()
+        game.renderer.present()
+    return frame
+
+
+def draw_game_idle():
+    game = bench_game()
+
+    def frame():
+        game.draw_game()
+        game.renderer.present()
+    return frame
+
+
+def draw_game_step():
+    game = bench_game()
+    step = pacing(game)
+
+    def frame():
+        step()
+        game.draw_game()
+        game.renderer.present()
+    return frame
+
+
+def draw_ui():
+    return bench_game().draw_ui
+
+
+def move_player_crowd():
+    return pacing(bench_game(200, 200, enemies=CROWD_SIZE))
+
+
+def enemy_turn_crowd():
+    # A packed arena, so plenty of the crowd is hunting; everyone is put back after each turn
+    game = bench_game(60, 60, enemies=CROWD_SIZE)
+    step = pacing(game)
+    dungeon = game.dungeon
+    start = [(enemy, enemy.x, enemy.y) for enemy in dungeon.enemies]
+
+    def turn():
+        step()
+        game.move_enemies()
+        game.game_state = "playing"
+        for enemy, x, y in start:
+            if (enemy.x, enemy.y) != (x, y):
+                dungeon.move_enemy(enemy, x, y)
+    return turn
+
+
+def text_cached():
+    return lambda: render_text("Hero 1 HP: 120/120", rpg.FONT_SIZE, rpg.WHITE, face=rpg.FONT_FACE)
+
+
+def text_uncached():
+    counter = iter(range(10 ** 9))
+    return lambda: render_text(f"Hero 1 hits Orc for {next(counter)} damage.", rpg.FONT_SIZE, rpg.WHITE, face=rpg.FONT_FACE)
+
+
+def load_sprites():
+    def load():
+        rpg.ASSETS.unload("atlas:" + rpg.SPRITE_ATLAS)
+        for name in rpg.SPRITE_FILES:
+            rpg.ASSETS.unload("sprite:" + name)
+        for name in rpg.SPRITE_FILES:
+            rpg.SPRITES[name]
+    return load
+
+
+def load_ui():
+    folder = os.path.join(rpg.script_dir, "ui_elements")
+
+    def load():
+        clear_ui_cache()
+        load_ui_elements(folder, scale=2)
+    return load
+
+
+def save_crowd():
+    game = bench_game(200, 200, enemies=CROWD_SIZE)
+    return lambda: encode_snapshot(game.snapshot())
+
+
+def load_crowd():
+    data = encode_snapshot(bench_game(200, 200, enemies=CROWD_SIZE).snapshot())
+    game = bench_game()
+    return lambda: game.restore(decode_snapshot(data))
+
+
+BENCHMARKS = [
+    ("generate_25x20", lambda: generate(25, 20)),
+    ("generate_100x100", lambda: generate(100, 100)),
+    ("generate_400x400", lambda: generate(400, 400)),
+    ("draw_game_full", draw_game_full),
+    ("draw_game_idle", draw_game_idle),
+    ("draw_game_step", draw_game_step),
+    ("draw_ui", draw_ui),
+    ("move_player_crowd", move_player_crowd),
+    ("enemy_turn_crowd", enemy_turn_crowd),
+    ("text_cached", text_cached),
+    ("text_uncached", text_uncached),
+    ("load_sprites", load_sprites),
+    ("load_ui", load_ui),
+    ("save_crowd", save_crowd),
+    ("load_crowd", load_crowd),
+]
+
+
+# --- Running ---
+def measure(fn, repeat=DEFAULT_REPEAT):
+    """Time fn like timeit: pick a call count per sample, then take repeat samples. Returns (number, ms per call per sample)."""
+    fn() # Warm caches and lazy loads before anything is timed
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            break
+        number *= 2
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - start) / number * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return number, samples
+
+
+def run_benchmarks(names=None, repeat=DEFAULT_REPEAT):
+    rpg.startup(defer=())
+    results = {}
+    for name, setup in BENCHMARKS:
+        if names and name not in names:
+            continue
+        number, samples = measure(setup(), repeat)
+        ordered = sorted(samples)
+        results[name] = {
+            "median_ms": ordered[len(ordered) // 2],
+            "min_ms": ordered[0],
+            "max_ms": ordered[-1],
+            "number": number,
+            "samples_ms": samples,
+        }
+        print(f"  {name:<22}{results[name]['median_ms']:10.4f} ms  (min {ordered[0]:.4f}, {number} calls x {repeat})")
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, limits=None):
+    """
+    Compare median times and return (lines, regressions). A benchmark
+    regresses when current / baseline - 1 exceeds its limit, or threshold
+    when it has none.
+    """
+    limits = limits or {}
+    lines = [f"  {'benchmark':<22}{'baseline':>12}{'current':>12}{'change':>9}"]
+    regressions = []
+    old, new = baseline["results"], current["results"]
+    order = {name: i for i, (name, _) in enumerate(BENCHMARKS)}
+    for name in sorted(old.keys() | new.keys(), key=lambda n: (order.get(n, len(order)), n)):
+        if name not in new:
+            lines.append(f"  {name:<22}{old[name]['median_ms']:10.4f}ms{'missing':>12}")
+            continue
+        if name not in old:
+            lines.append(f"  {name:<22}{'new':>12}{new[name]['median_ms']:10.4f}ms")
+            continue
+        change = new[name]["median_ms"] / old[name]["median_ms"] - 1
+        flag = ""
+        if change > limits.get(name, threshold):
+            regressions.append(name)
+            flag = "  REGRESSION"
+        lines.append(f"  {name:<22}{old[name]['median_ms']:10.4f}ms{new[name]['median_ms']:10.4f}ms{change:+9.1%}{flag}")
+    return lines, regressions
+
+
+# --- Arguments ---
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def parse_limit(text):
+    # "name=0.25" into ("name", 0.25)
+    name, sep, value = text.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=FRACTION, not {text!r}")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a fraction")
+
+
+def load_results(path, parser):
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        parser.error(f"could not read {path}: {e}")
+    if not isinstance(report, dict) or not isinstance(report.get("results"), dict):
+        parser.error(f"{path} is not a bench.py results file")
+    return report
+
+
+def check_names(names, known, parser, option):
+    unknown = set(names) - set(known)
+    if unknown:
+        parser.error(f"unknown benchmarks in {option}: {', '.join(sorted(unknown))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the performance benchmarks or compare two result files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="time every benchmark and write the results")
+    run_parser.add_argument("--out", default="bench_results.json")
+    run_parser.add_argument("--repeat", type=positive_int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--only", help="comma-separated benchmark names")
+    compare_parser = commands.add_parser("compare", help="flag benchmarks slower than a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed fractional slowdown of the median, e.g. 0.10 for 10%%")
+    compare_parser.add_argument("--limit", type=parse_limit, action="append", default=[], metavar="NAME=FRACTION",
+                                help="per-benchmark threshold; may be repeated")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        names = set(args.only.split(",")) if args.only else None
+        check_names(names or (), (name for name, _ in BENCHMARKS), run_parser, "--only")
+        print("Running benchmarks:")
+        report = run_benchmarks(names, args.repeat)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    else:
+        baseline = load_results(args.baseline, compare_parser)
+        current = load_results(args.current, compare_parser)
+        limits = dict(args.limit)
+        known = {name for name, _ in BENCHMARKS} | baseline["results"].keys() | current["results"].keys()
+        check_names(limits, known, compare_parser, "--limit")
+        lines, regressions = compare(baseline, current, args.threshold, limits)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import pygame
+
+
+class Camera:
+    """
+    A viewport onto a grid world that follows a target cell. Converts
+    between world cells and screen pixels, and reports which cells are on
+    screen so drawing can skip everything else.
+    """
+
+    def __init__(self, viewport, tile_size):
+        self.viewport = pygame.Rect(viewport)
+        self.tile_size = tile_size
+        # Cells at least partly on screen, and cells fully on screen
+        self.cols = -(-self.viewport.width // tile_size)
+        self.rows = -(-self.viewport.height // tile_size)
+        self.full_cols = self.viewport.width // tile_size
+        self.full_rows = self.viewport.height // tile_size
+        self.x = 0
+        self.y = 0
+        self.world_width = 0
+        self.world_height = 0
+
+    def set_world(self, width, height):
+        self.world_width = width
+        self.world_height = height
+        self.clamp()
+
+    def clamp(self):
+        # Worlds smaller than the view stay pinned to the top-left corner
+        self.x = max(0, min(self.x, self.world_width - self.full_cols))
+        self.y = max(0, min(self.y, self.world_height - self.full_rows))
+
+    def follow(self, x, y):
+        """Centre the view on cell (x, y), stopping at the world edges. Returns True if it moved."""
+        old = (self.x, self.y)
+        self.x = x - self.full_cols // 2
+        self.y = y - self.full_rows // 2
+        self.clamp()
+        return (self.x, self.y) != old
+
+    def visible_cells(self):
+        """(x1, y1, x2, y2) of the world cells on screen, clipped to the world; x2 and y2 are exclusive."""
+        return (self.x, self.y,
+                min(self.x + self.cols, self.world_width), min(self.y + self.rows, self.world_height))
+
+    def is_visible(self, x, y):
+        x1, y1, x2, y2 = self.visible_cells()
+        return x1 <= x < x2 and y1 <= y < y2
+
+    def world_to_screen(self, x, y):
+        return (self.viewport.x + (x - self.x) * self.tile_size,
+                self.viewport.y + (y - self.y) * self.tile_size)
+
+    def screen_to_world(self, px, py):
+        """The world cell under a screen or mouse position, or None if it isn't over the map."""
+        if not self.viewport.collidepoint(px, py):
+            return None
+        x = self.x + (px - self.viewport.x) // self.tile_size
+        y = self.y + (py - self.viewport.y) // self.tile_size
+        if not (0 <= x < self.world_width and 0 <= y < self.world_height):
+            return None
+        return x, y
+
+    def cell_rect(self, x, y):
+        """Screen rect of a world cell, clipped to the viewport."""
+        px, py = self.world_to_screen(x, y)
+        return pygame.Rect(px, py, self.tile_size, self.tile_size).clip(self.viewport)
@@ -0,0 +1,200 @@
+import itertools
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PREDICTION_TRIALS = 20000
+# Without NumPy fights are played one at a time, so far fewer fit in a frame
+PYTHON_TRIALS = 300
+# Fights still going after this many rounds (nobody can hurt anybody) count as not won
+MAX_ROUNDS = 100
+# Turn orders for up to this many combatants are drawn from a table of every permutation
+MAX_PERMUTED = 6
+WARRIOR, MAGE, ARCHER = 0, 1, 2
+SKILL_CLASSES = {"warrior": WARRIOR, "mage": MAGE, "archer": ARCHER}
+FIREBALL_MANA = 10
+
+
+def predict_combat(players, enemies, trials=PREDICTION_TRIALS, seed=0, use_numpy=True):
+    """
+    Play a fight between players and enemies many times over with the
+    game's combat rules and return {"win": probability the party wins,
+    "hp_loss": average party HP lost, "undecided": share of fights cut off
+    at MAX_ROUNDS, "trials": fights played}, or None if one side is
+    already beaten.
+
+    Each fight shuffles the turn order like Game.start_combat. Heroes use
+    their skill whenever it is ready, as simulate.py's scripted policy does,
+    and attack otherwise; skill cooldowns never tick down in the game, so a
+    Power Strike or Double Shot already on cooldown stays unavailable.
+    The game's own random state is left alone.
+    """
+    players = [p for p in players if p.is_alive()]
+    enemies = [e for e in enemies if e.is_alive()]
+    if not players or not enemies:
+        return None
+    if numpy is not None and use_numpy:
+        return predict_numpy(players, enemies, trials, numpy.random.default_rng(seed))
+    return predict_python(players, enemies, min(trials, PYTHON_TRIALS), random.Random(seed))
+
+
+def pick_alive(alive, r):
+    # Per trial (column), the row of a uniformly chosen living combatant, like
+    # random.choice over the living. Loops over the few rows rather than
+    # reducing across them, which NumPy does far slower for short axes.
+    if len(alive) == 1:
+        return numpy.zeros(alive.shape[1], dtype=numpy.int8)
+    rows = alive.view(numpy.int8)
+    count = rows[0] + rows[1]
+    for row in rows[2:]:
+        count += row
+    nth = (r * count).astype(numpy.int8)
+    index = numpy.zeros(alive.shape[1], dtype=numpy.int8)
+    seen = rows[0].copy()
+    for row in rows[1:]:
+        index += seen <= nth
+        seen += row
+    return index
+
+
+def turn_orders(n, trials, rng):
+    # One uniformly shuffled turn order per trial, as an (n, trials) array of combatant indices
+    if n <= MAX_PERMUTED:
+        permutations = numpy.array(list(itertools.permutations(range(n))), dtype=numpy.int8)
+        return permutations[rng.integers(len(permutations), size=trials)].T.copy()
+    return rng.random((trials, n)).argsort(axis=1).astype(numpy.int8).T.copy()
+
+
+def predict_numpy(players, enemies, trials, rng):
+    # State is one row per combatant and one column per trial, so every
+    # operation runs along contiguous rows and the loops only cover the
+    # handful of combatants. Each step, every trial has exactly one actor.
+    p, n = len(players), len(players) + len(enemies)
+    combatants = players + enemies
+    hits = [[max(0, a.attack - b.defense) for b in combatants] for a in combatants]
+    party_hp = sum(c.hp for c in players)
+
+    hp = numpy.array([[c.hp] for c in combatants], dtype=numpy.int16).repeat(trials, axis=1)
+    mana = numpy.array([[c.mana] for c in players], dtype=numpy.int16).repeat(trials, axis=1)
+    skill_used = numpy.array([[c.skill_cooldown > 0] for c in players]).repeat(trials, axis=1)
+    order = turn_orders(n, trials, rng)
+    trial_ids = numpy.arange(trials)
+    won = numpy.zeros(trials, dtype=bool)
+    hp_lost = numpy.zeros(trials, dtype=numpy.int64)
+
+    for _ in range(MAX_ROUNDS):
+        for k in range(n):
+            actor = order[k]
+            alive = hp > 0
+            # Only the actor's side picks a target, so one roll per trial serves both
+            roll = rng.random(len(trial_ids)) if n > 2 else None
+            hero_target = pick_alive(alive[:p], roll)
+            enemy_target = pick_alive(alive[p:], roll)
+            for c, combatant in enumerate(combatants):
+                now = (actor == c) & alive[c]
+                if not now.any():
+                    continue
+                if c >= p:
+                    # Enemies hit a random living hero
+                    for h in range(p):
+                        hp[h] -= (now & (hero_target == h)) * numpy.int16(hits[c][h])
+                    continue
+                kind = SKILL_CLASSES[combatant.char_class]
+                if kind == MAGE:
+                    ready = now & (mana[c] >= FIREBALL_MANA)
+                    mana[c] -= ready * numpy.int16(FIREBALL_MANA)
+                else:
+                    ready = now & ~skill_used[c]
+                    skill_used[c] |= ready
+                plain = now ^ ready
+                # Attacks and Power Strike hit one random living enemy; Fireball hits them all
+                skill_damage = {WARRIOR: combatant.attack * 2, ARCHER: combatant.attack, MAGE: 0}[kind]
+                for e in range(p, n):
+                    hit = enemy_target == e - p
+                    hp[e] -= (plain & hit) * numpy.int16(hits[c][e])
+                    if kind == MAGE:
+                        hp[e] -= (ready & alive[e]) * numpy.int16(combatant.attack // 2)
+                    else:
+                        hp[e] -= (ready & hit) * numpy.int16(skill_damage)
+                if kind == ARCHER and ready.any():
+                    # Double Shot's second arrow picks again among whoever survived the first
+                    again = pick_alive(hp[p:] > 0, rng.random(len(trial_ids)))
+                    for e in range(p, n):
+                        hp[e] -= (ready & (again == e - p) & (hp[e] > 0)) * numpy.int16(combatant.attack)
+
+        numpy.maximum(hp, 0, out=hp)
+        party_left = hp[0].astype(numpy.int64)
+        for h in range(1, p):
+            party_left += hp[h]
+        enemies_left = hp[p] > 0
+        for e in range(p + 1, n):
+            enemies_left |= hp[e] > 0
+        over = (party_left == 0) | ~enemies_left
+        finished = numpy.flatnonzero(over)
+        if len(finished):
+            ids = trial_ids[finished]
+            won[ids] = party_left[finished] > 0
+            hp_lost[ids] = party_hp - party_left[finished]
+            if len(finished) == len(trial_ids):
+                trial_ids = trial_ids[:0]
+                break
+            going = numpy.flatnonzero(~over)
+            hp, mana, skill_used, order = (a.take(going, axis=1) for a in (hp, mana, skill_used, order))
+            trial_ids = trial_ids[going]
+    undecided = len(trial_ids)
+    if undecided:
+        hp_lost[trial_ids] = party_hp - hp[:p].sum(axis=0, dtype=numpy.int64)
+    return {"win": float(won.mean()), "hp_loss": float(hp_lost.mean()), "undecided": undecided / trials, "trials": trials}
+
+
+def predict_python(players, enemies, trials, rng):
+    party_hp = sum(c.hp for c in players)
+    wins = 0
+    hp_lost = 0
+    undecided = 0
+    for _ in range(trials):
+        hp = {id(c): c.hp for c in players + enemies}
+        mana = {id(c): c.mana for c in players}
+        skill_used = {id(c): c.skill_cooldown > 0 for c in players}
+        turn_order = players + enemies
+        rng.shuffle(turn_order)
+        for _ in range(MAX_ROUNDS):
+            for actor in turn_order:
+                if hp[id(actor)] == 0:
+                    continue
+                living_enemies = [e for e in enemies if hp[id(e)] > 0]
+                if actor in enemies:
+                    living_players = [p for p in players if hp[id(p)] > 0]
+                    if living_players:
+                        target = rng.choice(living_players)
+                        hp[id(target)] = max(0, hp[id(target)] - max(0, actor.attack - target.defense))
+                    continue
+                if not living_enemies:
+                    continue
+                kind = SKILL_CLASSES[actor.char_class]
+                if kind == MAGE and mana[id(actor)] >= FIREBALL_MANA:
+                    for enemy in living_enemies:
+                        hp[id(enemy)] = max(0, hp[id(enemy)] - actor.attack // 2)
+                    mana[id(actor)] -= FIREBALL_MANA
+                elif kind != MAGE and not skill_used[id(actor)]:
+                    for _ in range(1 if kind == WARRIOR else 2):
+                        living_enemies = [e for e in enemies if hp[id(e)] > 0]
+                        if living_enemies:
+                            target = rng.choice(living_enemies)
+                            damage = actor.attack * 2 if kind == WARRIOR else actor.attack
+                            hp[id(target)] = max(0, hp[id(target)] - damage)
+                    skill_used[id(actor)] = True
+                else:
+                    target = rng.choice(living_enemies)
+                    hp[id(target)] = max(0, hp[id(target)] - max(0, actor.attack - target.defense))
+            party_left = sum(hp[id(p)] for p in players)
+            if party_left == 0 or not any(hp[id(e)] for e in enemies):
+                wins += party_left > 0
+                break
+        else:
+            undecided += 1
+        hp_lost += party_hp - party_left
+    return {"win": wins / trials, "hp_loss": hp_lost / trials, "undecided": undecided / trials, "trials": trials}
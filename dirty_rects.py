@@ -0,0 +1,46 @@
+import pygame
+
+
+class DirtyRenderer:
+    """
+    Tracks which parts of the screen changed since the last frame and
+    pushes only those regions to the display.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.full_redraw = True
+        self.rects = []
+        self.keys = {}
+
+    def invalidate(self):
+        """Force the next present() to update the whole screen."""
+        self.full_redraw = True
+        self.keys.clear()
+
+    def mark(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def changed(self, region, key, rect=None):
+        """
+        Compare key with the one recorded for region last frame.
+        Marks rect dirty and returns True when it differs.
+        """
+        if not self.full_redraw and self.keys.get(region) == key:
+            return False
+        self.keys[region] = key
+        if rect is not None:
+            self.mark(rect)
+        return True
+
+    @property
+    def dirty(self):
+        return self.full_redraw or bool(self.rects)
+
+    def present(self):
+        if self.full_redraw:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.full_redraw = False
+        self.rects = []
@@ -0,0 +1,242 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+UNREACHED = 255 # Distance-field value for cells too far from the party
+# Below this many enemies NumPy's per-call overhead costs more than the loop it replaces
+NUMPY_MIN_ENEMIES = 100
+# Four-way steps in the order ties are broken, as in pathfinding.NEIGHBOURS
+STEP_X = (0, 0, -1, 1)
+STEP_Y = (-1, 1, 0, 0)
+
+
+class BatchField:
+    """
+    An Enemy attribute that lives in its level's EnemyBatch array while the
+    enemy is attached to one, and on the instance otherwise.
+    """
+
+    def __init__(self, array_name):
+        self.array_name = array_name
+
+    def __set_name__(self, owner, name):
+        self.private = "_" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj.batch is None:
+            return obj.__dict__[self.private]
+        return getattr(obj.batch, self.array_name)[obj.slot]
+
+    def __set__(self, obj, value):
+        if obj.batch is None:
+            obj.__dict__[self.private] = value
+        else:
+            getattr(obj.batch, self.array_name)[obj.slot] = value
+
+
+class EnemyBatch:
+    """
+    Per-enemy AI state for one level in parallel arrays, indexed by slot:
+    position, HP, aggro, cooldown and move delay. Enemy objects attached
+    here are thin views onto their slot, so a turn can be planned for every
+    enemy at once without touching the objects.
+    """
+
+    def __init__(self):
+        self.xs = array("i")
+        self.ys = array("i")
+        self.hp = array("i")
+        self.cooldown = array("i")
+        self.move_delay = array("i")
+        self.aggro = bytearray()
+        self.alive = bytearray()
+        self.enemies = [] # slot -> Enemy, or None for a free slot
+        self.free = []
+
+    def attach(self, enemy):
+        x, y, hp, cooldown, aggro = enemy.x, enemy.y, enemy.hp, enemy.cooldown, enemy.aggro
+        if self.free:
+            slot = self.free.pop()
+            self.xs[slot], self.ys[slot], self.hp[slot] = x, y, hp
+            self.cooldown[slot] = cooldown
+            self.move_delay[slot] = enemy.move_delay
+            self.aggro[slot] = aggro
+            self.alive[slot] = 1
+            self.enemies[slot] = enemy
+        else:
+            slot = len(self.enemies)
+            self.xs.append(x)
+            self.ys.append(y)
+            self.hp.append(hp)
+            self.cooldown.append(cooldown)
+            self.move_delay.append(enemy.move_delay)
+            self.aggro.append(aggro)
+            self.alive.append(1)
+            self.enemies.append(enemy)
+        enemy.batch = self
+        enemy.slot = slot
+
+    def attach_all(self, enemies, xs, ys, hp, cooldowns, aggro):
+        """Attach enemies in bulk from columns of their values, as loading a save game does."""
+        start = len(self.enemies)
+        self.xs.extend(xs)
+        self.ys.extend(ys)
+        self.hp.extend(hp)
+        self.cooldown.extend(cooldowns)
+        self.move_delay.extend(enemy.move_delay for enemy in enemies)
+        self.aggro.extend(aggro)
+        self.alive.extend(bytes([1]) * len(enemies))
+        self.enemies.extend(enemies)
+        for slot, enemy in enumerate(enemies, start):
+            enemy.batch = self
+            enemy.slot = slot
+
+    def detach(self, enemy):
+        slot = enemy.slot
+        x, y, hp = self.xs[slot], self.ys[slot], self.hp[slot]
+        cooldown, aggro = self.cooldown[slot], self.aggro[slot]
+        enemy.batch = None
+        enemy.slot = -1
+        enemy.x, enemy.y, enemy.hp = x, y, hp
+        enemy.cooldown, enemy.aggro = cooldown, aggro
+        self.alive[slot] = 0
+        self.aggro[slot] = 0
+        self.enemies[slot] = None
+        self.free.append(slot)
+
+    def detach_all(self):
+        for enemy in self.enemies:
+            if enemy is not None:
+                self.detach(enemy)
+
+    def calm_all(self):
+        self.aggro[:] = bytes(len(self.aggro))
+
+    def __len__(self):
+        return len(self.enemies) - len(self.free)
+
+
+def plan_turn(batch, field, x0, y0, width, height, aggro_range, use_numpy=True):
+    """
+    Decide one turn for every enemy in the batch against a distance-to-party
+    field covering cells [x0, x0 + width) x [y0, y0 + height), one byte per
+    cell with UNREACHED for cells out of range.
+
+    An enemy within aggro_range steps becomes aggressive and stays so while
+    it is on the field. Aggressive enemies whose cooldown has run out step
+    to their closest neighbour; a step onto the party (distance 0) is an
+    attack. Closer enemies go first, a cell already holding an enemy is
+    never entered, and two enemies never take the same cell.
+
+    Returns (moves, attacker): moves is a list of (slot, x, y) and attacker
+    the slot of the first enemy to reach the party, or None. When there is
+    an attacker nobody moves. Updates the batch's aggro and cooldowns.
+    """
+    if numpy is not None and use_numpy and len(batch.enemies) >= NUMPY_MIN_ENEMIES:
+        return plan_turn_numpy(batch, field, x0, y0, width, height, aggro_range)
+    return plan_turn_python(batch, field, x0, y0, width, height, aggro_range)
+
+
+def plan_turn_numpy(batch, field, x0, y0, width, height, aggro_range):
+    count = len(batch.enemies)
+    if count == 0:
+        return [], None
+    xs = numpy.frombuffer(batch.xs, dtype=numpy.intc)
+    ys = numpy.frombuffer(batch.ys, dtype=numpy.intc)
+    cooldown = numpy.frombuffer(batch.cooldown, dtype=numpy.intc)
+    move_delay = numpy.frombuffer(batch.move_delay, dtype=numpy.intc)
+    aggro = numpy.frombuffer(batch.aggro, dtype=numpy.uint8)
+    alive = numpy.frombuffer(batch.alive, dtype=numpy.uint8).astype(bool)
+    distances = numpy.frombuffer(field, dtype=numpy.uint8)
+
+    # Enemies one cell inside the field, so all four neighbours are on it too
+    on_field = alive & (xs > x0) & (xs < x0 + width - 1) & (ys > y0) & (ys < y0 + height - 1)
+    aggro[~on_field] = 0
+    slots = numpy.flatnonzero(on_field)
+    cells = (ys[slots] - y0) * width + (xs[slots] - x0)
+    here = distances[cells]
+    aggro[slots] = numpy.where(here <= aggro_range, 1, numpy.where(here == UNREACHED, 0, aggro[slots]))
+    ready = cooldown[slots] == 0
+    cooldown[alive & (cooldown > 0)] -= 1
+
+    around = numpy.stack([distances[cells - width], distances[cells + width], distances[cells - 1], distances[cells + 1]])
+    best = around.argmin(axis=0)
+    best_distance = around[best, numpy.arange(len(slots))]
+    acting = (aggro[slots] == 1) & ready & (here != UNREACHED) & (best_distance < here)
+    if not acting.any():
+        return [], None
+
+    actors = slots[acting]
+    order = numpy.lexsort((actors, xs[actors], ys[actors], here[acting]))
+    actors = actors[order]
+    steps = best[acting][order]
+    reaches = best_distance[acting][order] == 0
+    if reaches.any():
+        return [], int(actors[numpy.argmax(reaches)])
+
+    targets = cells[acting][order] + numpy.array(STEP_Y)[steps] * width + numpy.array(STEP_X)[steps]
+    occupied = numpy.zeros(width * height, dtype=bool)
+    occupied[cells] = True
+    _, first = numpy.unique(targets, return_index=True)
+    first = numpy.sort(first)
+    first = first[~occupied[targets[first]]]
+    movers = actors[first]
+    cooldown[movers] = move_delay[movers]
+    new_x = xs[movers] + numpy.array(STEP_X)[steps[first]]
+    new_y = ys[movers] + numpy.array(STEP_Y)[steps[first]]
+    return [(int(s), int(x), int(y)) for s, x, y in zip(movers, new_x, new_y)], None
+
+
+def plan_turn_python(batch, field, x0, y0, width, height, aggro_range):
+    xs, ys, cooldown, aggro, alive = batch.xs, batch.ys, batch.cooldown, batch.aggro, batch.alive
+    x_max, y_max = x0 + width - 1, y0 + height - 1
+    actors = []
+    occupied = set()
+    for slot in range(len(batch.enemies)):
+        if not alive[slot]:
+            continue
+        x, y = xs[slot], ys[slot]
+        ready = cooldown[slot] == 0
+        if not ready:
+            cooldown[slot] -= 1
+        if not (x0 < x < x_max and y0 < y < y_max):
+            aggro[slot] = 0
+            continue
+        cell = (y - y0) * width + (x - x0)
+        occupied.add(cell)
+        here = field[cell]
+        if here <= aggro_range:
+            aggro[slot] = 1
+        elif here == UNREACHED:
+            aggro[slot] = 0
+        if not (aggro[slot] and ready and here != UNREACHED):
+            continue
+        around = (field[cell - width], field[cell + width], field[cell - 1], field[cell + 1])
+        best_distance = min(around)
+        if best_distance < here:
+            actors.append((here, y, x, slot, around.index(best_distance), best_distance, cell))
+    if not actors:
+        return [], None
+
+    actors.sort()
+    for here, y, x, slot, step, best_distance, cell in actors:
+        if best_distance == 0:
+            return [], slot
+
+    moves = []
+    claimed = set()
+    for here, y, x, slot, step, best_distance, cell in actors:
+        target = cell + STEP_Y[step] * width + STEP_X[step]
+        if target in claimed:
+            continue
+        claimed.add(target)
+        if target in occupied:
+            continue
+        cooldown[slot] = batch.move_delay[slot]
+        moves.append((slot, x + STEP_X[step], y + STEP_Y[step]))
+    return moves, None
@@ -0,0 +1,134 @@
+# Octant transforms for shadowcasting: (xx, xy, yx, yy) per octant
+OCTANTS = [
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+]
+
+
+def compute_fov(x, y, radius, is_transparent, width, height):
+    """
+    Cells visible from (x, y) within `radius`, by recursive shadowcasting.
+    Opaque cells that are seen (walls) are included; cells outside the
+    width x height grid are treated as opaque and never returned.
+    """
+    visible = {(x, y)}
+
+    def blocks(cx, cy):
+        return not (0 <= cx < width and 0 <= cy < height) or not is_transparent(cx, cy)
+
+    def cast(row, start, end, xx, xy, yx, yy):
+        if start < end:
+            return
+        radius_sq = radius * radius
+        new_start = start
+        for j in range(row, radius + 1):
+            dx, dy = -j - 1, -j
+            blocked = False
+            while dx <= 0:
+                dx += 1
+                cx, cy = x + dx * xx + dy * xy, y + dx * yx + dy * yy
+                left_slope, right_slope = (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5)
+                if start < right_slope:
+                    continue
+                if end > left_slope:
+                    break
+                if dx * dx + dy * dy <= radius_sq and 0 <= cx < width and 0 <= cy < height:
+                    visible.add((cx, cy))
+                if blocked:
+                    if blocks(cx, cy):
+                        new_start = right_slope
+                    else:
+                        blocked = False
+                        start = new_start
+                elif blocks(cx, cy) and j < radius:
+                    # Start of a wall run: scan the part of the next row it doesn't shadow
+                    blocked = True
+                    cast(j + 1, start, left_slope, xx, xy, yx, yy)
+                    new_start = right_slope
+            if blocked:
+                break
+
+    for octant in OCTANTS:
+        cast(1, 1.0, 0.0, *octant)
+    return visible
+
+
+class ExploredMap:
+    """
+    One explored bit per cell. Bits are stored in BLOCK x BLOCK pieces that
+    are only allocated once a cell in them is seen, so the cost follows the
+    explored area rather than the size of the level.
+    """
+    BLOCK = 32
+
+    def __init__(self):
+        self.blocks = {}
+        self.count = 0
+
+    def mark(self, x, y):
+        """Mark a cell explored. Returns True if it wasn't already."""
+        key = (x // self.BLOCK, y // self.BLOCK)
+        bits = self.blocks.get(key)
+        if bits is None:
+            bits = self.blocks[key] = bytearray(self.BLOCK * self.BLOCK // 8)
+        index = (y % self.BLOCK) * self.BLOCK + x % self.BLOCK
+        mask = 1 << (index & 7)
+        if bits[index >> 3] & mask:
+            return False
+        bits[index >> 3] |= mask
+        self.count += 1
+        return True
+
+    def is_explored(self, x, y):
+        bits = self.blocks.get((x // self.BLOCK, y // self.BLOCK))
+        if bits is None:
+            return False
+        index = (y % self.BLOCK) * self.BLOCK + x % self.BLOCK
+        return bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def __len__(self):
+        return self.count
+
+
+class FieldOfView:
+    """
+    The party's merged field of view. Each viewer's result is cached by its
+    position and the map revision, so only members who moved, or a change
+    to the map, cause any shadowcasting.
+    """
+
+    def __init__(self, radius, max_cached=64):
+        self.radius = radius
+        self.max_cached = max_cached
+        self.visible = set()
+        self.key = None
+        self.cache = {}
+        self.cache_map = None
+        self.computed = 0
+
+    def update(self, dungeon, viewers):
+        """
+        Recompute the visible set if anything relevant changed, marking new
+        cells explored on the dungeon. Returns the newly explored cells.
+        """
+        positions = tuple((v.x, v.y) for v in viewers)
+        key = (id(dungeon), dungeon.revision, positions)
+        if key == self.key:
+            return []
+        if self.cache_map != key[:2] or len(self.cache) > self.max_cached:
+            self.cache = {}
+            self.cache_map = key[:2]
+        visible = set()
+        for x, y in set(positions):
+            cells = self.cache.get((x, y))
+            if cells is None:
+                cells = self.cache[(x, y)] = frozenset(
+                    compute_fov(x, y, self.radius, dungeon.is_transparent, dungeon.width, dungeon.height))
+                self.computed += 1
+            visible |= cells
+        self.visible = visible
+        self.key = key
+        return [cell for cell in visible if dungeon.explored.mark(*cell)]
+
+    def is_visible(self, x, y):
+        return (x, y) in self.visible
@@ -0,0 +1,67 @@
+from collections import deque
+
+import pygame
+
+
+class FrameScheduler:
+    """
+    Central frame pacing for the main loop. Caps the frame rate, can block
+    on pygame.event.wait in turn-based states instead of spinning, and keeps
+    a short history of frame times. The wait happens once the frame is on
+    screen, and never right after a frame that handled input, so the
+    response to an event is drawn on the very next frame.
+    """
+
+    def __init__(self, fps=60, idle_timeout_ms=250, history=120):
+        self.fps = fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.wait_for_input = False
+        self.clock = pygame.time.Clock()
+        self.frame_ms = deque(maxlen=history)
+        self.work_ms = deque(maxlen=history)
+        self.blocked_ms = 0
+        self.woken = [] # The event that ended the last wait(), handed out by the next events()
+        self.handled_input = False
+
+    def events(self):
+        """Return the pending events without blocking."""
+        events = self.woken + pygame.event.get()
+        self.woken = []
+        self.handled_input = self.handled_input or bool(events)
+        return events
+
+    def wait(self, timeout_ms=None):
+        """
+        In wait-for-input mode, sleep until an event arrives or the timeout
+        expires, so an idle game uses no CPU. Call it after the frame is
+        presented. A frame that handled input doesn't wait: the next one
+        draws the result first.
+        """
+        if timeout_ms is None:
+            timeout_ms = self.idle_timeout_ms
+        handled, self.handled_input = self.handled_input, False
+        # pygame.event.wait(0) blocks forever, so a zero timeout doesn't wait at all
+        if not self.wait_for_input or handled or timeout_ms < 1 or pygame.event.peek():
+            return
+        start = pygame.time.get_ticks()
+        first = pygame.event.wait(int(timeout_ms))
+        self.blocked_ms += pygame.time.get_ticks() - start
+        if first.type != pygame.NOEVENT:
+            self.woken.append(first)
+
+    def tick(self):
+        self.clock.tick(self.fps)
+        self.frame_ms.append(self.clock.get_time())
+        # Time spent blocked on input is idle, not work
+        self.work_ms.append(max(0, self.clock.get_rawtime() - self.blocked_ms))
+        self.blocked_ms = 0
+
+    def stats(self):
+        if not self.frame_ms:
+            return {"fps": 0.0, "avg_frame_ms": 0.0, "max_frame_ms": 0, "avg_work_ms": 0.0}
+        return {
+            "fps": self.clock.get_fps(),
+            "avg_frame_ms": sum(self.frame_ms) / len(self.frame_ms),
+            "max_frame_ms": max(self.frame_ms),
+            "avg_work_ms": sum(self.work_ms) / len(self.work_ms),
+        }
@@ -1,5 +1,30 @@
 import os
 import pygame
+from atlas import load_atlas
+
+# You can rename these to whatever you want
+UI_MAP = {
+    "ui_element_005": "panel",
+    "ui_element_028": "button_blue",
+    "ui_element_029": "button_blue_hover",
+    "ui_element_030": "button_green",
+    "ui_element_031": "button_green_hover",
+    "ui_element_032": "button_red",
+    "ui_element_033": "button_red_hover",
+    "ui_element_034": "icon_play",
+    "ui_element_035": "icon_options",
+    "ui_element_036": "icon_quit",
+    "ui_element_001": "background",
+}
+
+# Process-wide cache shared by rpg_pygame, UIManager and MainMenuUI:
+# (folder, scale, mtime) -> {name: Surface}. The surfaces are shared, so
+# callers must treat them as read-only.
+_cache = {}
+# (folder, scale) -> mtime of the entry in _cache, so a cached folder is
+# served without touching the disk at all
+_latest = {}
+_stats = {"hits": 0, "misses": 0}
 
 def load_sprite(path, size=None):
     """Load a sprite with optional scaling."""
@@ -8,35 +33,68 @@ def load_sprite(path, size=None):
         sprite = pygame.transform.scale(sprite, size)
     return sprite
 
-def load_ui_elements(ui_folder, scale=2):
+def ui_atlas_name(ui_folder, scale):
+    """Name of the atlas that `python atlas.py` builds for this folder and scale."""
+    return f"{os.path.basename(os.path.normpath(ui_folder))}_x{scale}"
+
+def folder_mtime(ui_folder):
+    """Newest modification time of the folder and the UI element files in it."""
+    mtime = os.stat(ui_folder).st_mtime
+    for entry in os.scandir(ui_folder):
+        if entry.name.endswith(".png") and os.path.splitext(entry.name)[0] in UI_MAP:
+            mtime = max(mtime, entry.stat().st_mtime)
+    return mtime
+
+def load_ui_elements(ui_folder, scale=2, revalidate=False):
     """
     Dynamically loads all UI elements from a folder.
     Applies scaling and returns a dictionary with semantic keys.
+    Results are cached for the whole process; pass revalidate=True to
+    pick up files changed on disk since the first load.
     """
-    # You can rename these to whatever you want
-    ui_map = {
-        "ui_element_005": "panel",
-        "ui_element_028": "button_blue",
-        "ui_element_029": "button_blue_hover",
-        "ui_element_030": "button_green",
-        "ui_element_031": "button_green_hover",
-        "ui_element_032": "button_red",
-        "ui_element_033": "button_red_hover",
-        "ui_element_034": "icon_play",
-        "ui_element_035": "icon_options",
-        "ui_element_036": "icon_quit",
-        "ui_element_001": "background",
+    folder = os.path.abspath(ui_folder)
+    mtime = _latest.get((folder, scale))
+    if mtime is None or revalidate:
+        mtime = folder_mtime(folder)
+    key = (folder, scale, mtime)
+    if key in _cache:
+        _stats["hits"] += 1
+    else:
+        _stats["misses"] += 1
+        # A newer mtime replaces whatever was cached for this folder and scale
+        for stale in [k for k in _cache if k[:2] == (folder, scale)]:
+            del _cache[stale]
+        _cache[key] = read_ui_elements(folder, scale)
+        _latest[(folder, scale)] = mtime
+    return dict(_cache[key])
+
+def clear_ui_cache():
+    _cache.clear()
+    _latest.clear()
+
+def ui_cache_stats():
+    return {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "entries": len(_cache),
+        "elements": sum(len(elements) for elements in _cache.values()),
     }
 
+def read_ui_elements(ui_folder, scale):
+    """Load the elements from disk, using the prebuilt atlas for the folder when one exists."""
+    elements = load_atlas(ui_atlas_name(ui_folder, scale))
+    if elements is not None:
+        return elements
+
     elements = {}
     for file in os.listdir(ui_folder):
         if file.endswith(".png") and file.startswith("ui_element_"):
             key = os.path.splitext(file)[0]  # e.g., ui_element_028
-            if key in ui_map:
+            if key in UI_MAP:
                 image_path = os.path.join(ui_folder, file)
                 sprite = load_sprite(image_path)
                 if scale != 1:
                     w, h = sprite.get_size()
                     sprite = pygame.transform.scale(sprite, (w * scale, h * scale))
-                elements[ui_map[key]] = sprite
+                elements[UI_MAP[key]] = sprite
     return elements
@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Every finished run is kept. Scores rank by dungeon level, then XP, then the
+# newest run first, and each ranking is read straight off an index in that order.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    party TEXT NOT NULL,
+    classes TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    won INTEGER,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (level, xp);
+CREATE INDEX IF NOT EXISTS runs_by_party ON runs (party, level, xp);
+CREATE TABLE IF NOT EXISTS run_classes (
+    char_class TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    PRIMARY KEY (char_class, level, xp, run_id)
+) WITHOUT ROWID;
+"""
+COLUMNS = ("id", "party", "classes", "level", "xp", "won", "finished")
+BUSY_TIMEOUT_S = 5 # How long a write waits for another game's write to finish
+
+
+class HighscoreStore:
+    """
+    The highscore table in a SQLite database. Each submit is its own
+    transaction, so several games can share the file safely.
+
+    Queries return one page of rows, as dicts, in rank order. To get the
+    next page, pass the last row of the current one as after. Fetching a
+    page costs the same however many runs are stored. The database is
+    opened on first use. A new database imports any scores from the old
+    JSON highscore file.
+    """
+
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.conn = None
+
+    def connection(self):
+        if self.conn is None:
+            # Autocommit, so every write is an explicit transaction from transaction()
+            self.conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+            # Readers never block the writer, or each other
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            with self.transaction() as conn:
+                new = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'runs'").fetchone() is None
+                for statement in SCHEMA.split(";"):
+                    conn.execute(statement)
+                # In the same transaction, so two games opening a new database can't both import
+                if new and self.legacy_json and os.path.exists(self.legacy_json):
+                    self.import_json(self.legacy_json, conn)
+        return self.conn
+
+    @contextmanager
+    def transaction(self):
+        # IMMEDIATE takes the write lock up front; a second writer waits up to BUSY_TIMEOUT_S for it
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def submit(self, party, classes, level, xp, won=None, finished=None):
+        """Record a finished run and return its id."""
+        classes = sorted(classes)
+        self.connection()
+        with self.transaction() as conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (party, classes, level, xp, won, finished) VALUES (?, ?, ?, ?, ?, ?)",
+                (party, ",".join(classes), level, xp, won, time.time() if finished is None else finished)).lastrowid
+            conn.executemany("INSERT OR IGNORE INTO run_classes VALUES (?, ?, ?, ?)",
+                             [(char_class, level, xp, run_id) for char_class in set(classes)])
+        return run_id
+
+    def import_json(self, path, conn):
+        # Old entries carry no classes, outcome or time
+        try:
+            with open(path) as f:
+                scores = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not import highscores from {path}: {e}")
+            return
+        conn.executemany("INSERT INTO runs (party, classes, level, xp) VALUES (?, '', ?, ?)",
+                         [(score["party"], score["level"], score["xp"]) for score in scores])
+
+    # --- Queries ---
+    def page(self, where, params, limit, after, table="runs", id_column="id"):
+        # Keyset paging: continue below the previous page's last (level, xp, id) instead of counting past an offset
+        conditions = [where] if where else []
+        if after is not None:
+            conditions.append(f"({table}.level, {table}.xp, {table}.{id_column}) < (?, ?, ?)")
+            params = params + (after["level"], after["xp"], after["id"])
+        sql = f"SELECT {', '.join('runs.' + c for c in COLUMNS)} FROM {table}"
+        if table != "runs":
+            sql += f" JOIN runs ON runs.id = {table}.{id_column}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {table}.level DESC, {table}.xp DESC, {table}.{id_column} DESC LIMIT ?"
+        rows = self.connection().execute(sql, params + (limit,)).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def top(self, limit=10, after=None):
+        return self.page("", (), limit, after)
+
+    def for_party(self, party, limit=10, after=None):
+        return self.page("runs.party = ?", (party,), limit, after)
+
+    def for_class(self, char_class, limit=10, after=None):
+        """Runs with at least one hero of this class."""
+        return self.page("run_classes.char_class = ?", (char_class,), limit, after, "run_classes", "run_id")
@@ -0,0 +1,60 @@
+import time
+
+from workers import get_executor
+
+
+class LevelPregenerator:
+    """
+    Builds upcoming dungeon levels on a worker thread so taking the stairs
+    is an instant swap. Generation must be deterministic in (level, seed):
+    a level built in the background is identical to one built on demand.
+    """
+
+    def __init__(self, build_level):
+        self.build_level = build_level
+        self.pending = {}
+        self.timings = []
+
+    def request(self, level, seed):
+        key = (level, seed)
+        if key not in self.pending:
+            self.pending[key] = get_executor("levelgen").submit(self.timed_build, level, seed)
+
+    def timed_build(self, level, seed):
+        start = time.perf_counter()
+        dungeon = self.build_level(level, seed)
+        return dungeon, (time.perf_counter() - start) * 1000
+
+    def take(self, level, seed):
+        """Return the level, falling back to building it here if it isn't ready."""
+        future = self.pending.pop((level, seed), None)
+        if future is not None and future.done():
+            source = "pregenerated"
+        elif future is not None and not future.cancel():
+            # Already running on the worker; finishing it beats starting over
+            source = "waited"
+        else:
+            future = None
+            source = "sync"
+        if future is None:
+            dungeon, ms = self.timed_build(level, seed)
+        else:
+            dungeon, ms = future.result()
+        self.timings.append({"level": level, "source": source, "ms": ms})
+        return dungeon
+
+    def cancel_all(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def stats(self):
+        if not self.timings:
+            return {"levels": 0, "avg_ms": 0.0, "max_ms": 0.0, "pregenerated": 0}
+        times = [t["ms"] for t in self.timings]
+        return {
+            "levels": len(self.timings),
+            "avg_ms": sum(times) / len(times),
+            "max_ms": max(times),
+            "pregenerated": sum(1 for t in self.timings if t["source"] == "pregenerated"),
+        }
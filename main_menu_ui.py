@@ -1,8 +1,8 @@
-import pygame
+import os
 from golden_ui_loader import load_ui_elements
+from text_cache import render_text
 
-# Load UI elements (assume scale=2 for consistency)
-UI_ELEMENTS = load_ui_elements("ui_elements", scale=2)
+UI_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui_elements")
 
 class MainMenuUI:
     def __init__(self, screen, font, screen_width, screen_height):
@@ -10,7 +10,8 @@ class MainMenuUI:
         self.font = font
         self.screen_width = screen_width
         self.screen_height = screen_height
-        # Assets
+        # Assets (assume scale=2 for consistency); shared with the rest of the game
+        UI_ELEMENTS = load_ui_elements(UI_FOLDER, scale=2)
         self.bg = UI_ELEMENTS.get("background")
         self.banner_panel = UI_ELEMENTS.get("panel")
         self.button_green = UI_ELEMENTS.get("button_green")
@@ -40,8 +41,7 @@ class MainMenuUI:
         self.draw_button(self.button_red, self.icon_quit, "QUIT", self.screen_width // 2 - 120, self.screen_height // 2 + 80)
 
     def draw_text(self, text, x, y, size=48):
-        font = pygame.font.Font(None, size)
-        text_surface = font.render(text, True, (255, 255, 255))
+        text_surface = render_text(text, size, (255, 255, 255))
         text_rect = text_surface.get_rect(center=(x, y))
         self.screen.blit(text_surface, text_rect)
 
@@ -52,7 +52,6 @@ class MainMenuUI:
             icon_rect = icon_img.get_rect()
             icon_rect.center = (x + 30, y + button_img.get_height() // 2)
             self.screen.blit(icon_img, icon_rect)
-        font = pygame.font.Font(None, 36)
-        text_surface = font.render(text, True, (255, 255, 255))
+        text_surface = render_text(text, 36, (255, 255, 255))
         text_rect = text_surface.get_rect(midleft=(x + 60, y + button_img.get_height() // 2 if button_img else y + 25))
         self.screen.blit(text_surface, text_rect)
@@ -0,0 +1,151 @@
+import heapq
+from collections import deque
+
+# Four-way movement, in the order ties are broken
+NEIGHBOURS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def astar(start, goal, is_walkable, width, height, max_nodes=20000):
+    """
+    Shortest four-way route from start to goal as a list of cells, start
+    excluded and goal included. The goal itself may be unwalkable (an
+    occupied cell, say). Returns None if there is no route or the search
+    expands more than max_nodes cells.
+    """
+    if start == goal:
+        return []
+    gx, gy = goal
+    came_from = {start: None}
+    cost = {start: 0}
+    counter = 0
+    frontier = [(abs(start[0] - gx) + abs(start[1] - gy), counter, start)]
+    while frontier and len(came_from) <= max_nodes:
+        _, _, cell = heapq.heappop(frontier)
+        if cell == goal:
+            path = []
+            while cell != start:
+                path.append(cell)
+                cell = came_from[cell]
+            path.reverse()
+            return path
+        x, y = cell
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            if (nx, ny) != goal and not is_walkable(nx, ny):
+                continue
+            new_cost = cost[cell] + 1
+            if new_cost < cost.get((nx, ny), new_cost + 1):
+                cost[(nx, ny)] = new_cost
+                came_from[(nx, ny)] = cell
+                counter += 1
+                heapq.heappush(frontier, (new_cost + abs(nx - gx) + abs(ny - gy), counter, (nx, ny)))
+    return None
+
+
+class DistanceMap:
+    """
+    Walking distance from every cell within max_distance steps to the
+    nearest goal (a Dijkstra map, or flow field). One map serves every
+    monster on the level: each just steps to a neighbour with a smaller
+    distance. Tile changes are applied incrementally; only new goals
+    cost a full rebuild.
+    """
+
+    def __init__(self, dungeon, max_distance):
+        self.dungeon = dungeon
+        self.max_distance = max_distance
+        self.distances = {}
+        self.goals = ()
+        self.seen_tile_changes = len(dungeon.tile_changes)
+        self.rebuilds = 0
+        self.incremental_updates = 0
+        self.revision = 0 # Bumped whenever a distance may have changed
+        self.grid = None
+        self.grid_key = None
+
+    def update(self, goals):
+        """Bring the map up to date for these goals. Returns True if it was rebuilt from scratch."""
+        goals = tuple(sorted(set(goals)))
+        if goals != self.goals:
+            self.goals = goals
+            self.seen_tile_changes = len(self.dungeon.tile_changes)
+            self.rebuild()
+            return True
+        changes = self.dungeon.tile_changes
+        for x, y in changes[self.seen_tile_changes:]:
+            self.tile_changed(x, y)
+        self.seen_tile_changes = len(changes)
+        return False
+
+    def rebuild(self):
+        self.distances = {goal: 0 for goal in self.goals}
+        self.expand(deque(self.goals))
+        self.rebuilds += 1
+        self.revision += 1
+
+    def expand(self, queue):
+        # Breadth-first relaxation outwards from cells whose distance is already final
+        distances = self.distances
+        known_distance = distances.get
+        is_walkable = self.dungeon.is_walkable
+        width, height = self.dungeon.width, self.dungeon.height
+        max_distance = self.max_distance
+        popleft, append = queue.popleft, queue.append
+        while queue:
+            cell = popleft()
+            next_distance = distances[cell] + 1
+            if next_distance > max_distance:
+                continue
+            x, y = cell
+            for neighbour in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+                known = known_distance(neighbour)
+                if known is not None and known <= next_distance:
+                    continue
+                nx, ny = neighbour
+                if 0 <= nx < width and 0 <= ny < height and is_walkable(nx, ny):
+                    distances[neighbour] = next_distance
+                    append(neighbour)
+
+    def tile_changed(self, x, y):
+        self.incremental_updates += 1
+        self.revision += 1
+        distances = self.distances
+        if self.dungeon.is_walkable(x, y):
+            # A cell opened up: distances can only shrink, so relax outwards from it
+            around = [distances[(x + dx, y + dy)] for dx, dy in NEIGHBOURS if (x + dx, y + dy) in distances]
+            best = 0 if (x, y) in self.goals else min(around, default=self.max_distance) + 1
+            if best > self.max_distance or best >= distances.get((x, y), best + 1):
+                return
+            distances[(x, y)] = best
+            self.expand(deque([(x, y)]))
+        else:
+            # A cell closed: only cells farther than it can have routed through it.
+            # Drop those and regrow them from the cells at its distance.
+            closed = distances.pop((x, y), None)
+            if closed is None:
+                return
+            for cell in [cell for cell, d in distances.items() if d > closed]:
+                del distances[cell]
+            self.expand(deque(cell for cell, d in distances.items() if d == closed))
+
+    def to_grid(self, x0, y0, width, height, unreached=255):
+        """
+        The distances over [x0, x0 + width) x [y0, y0 + height) as a
+        row-major bytearray. The same window asked for again before the
+        map changes returns the same grid, so callers must not modify it.
+        """
+        key = (x0, y0, width, height, unreached, self.revision)
+        if key == self.grid_key:
+            return self.grid
+        grid = bytearray([unreached]) * (width * height)
+        for (x, y), d in self.distances.items():
+            if x0 <= x < x0 + width and y0 <= y < y0 + height:
+                grid[(y - y0) * width + (x - x0)] = d
+        self.grid, self.grid_key = grid, key
+        return grid
+
+    def get(self, x, y):
+        """Distance from (x, y) to the nearest goal, or None if it's farther than max_distance."""
+        return self.distances.get((x, y))
@@ -0,0 +1,174 @@
+import csv
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import pygame
+
+from text_cache import text_cache_stats
+
+# Frame phases, timed exclusively: time spent in a nested phase only counts towards that phase
+PHASES = ("events", "update", "draw", "ui", "flip", "overlay", "idle")
+CSV_COLUMNS = ("frame", "state", "frame_ms", "work_ms") + tuple(f"{name}_ms" for name in PHASES) + (
+    "blits", "texts", "text_renders")
+NULL_PHASE = nullcontext() # What phase() hands out while the monitor is off
+OVERLAY_SIZE = (320, 200)
+OVERLAY_REFRESH_S = 0.25 # The overlay's text and graph are redrawn at most this often
+GRAPH_FRAMES = 150
+GRAPH_MAX_MS = 50
+
+
+class PhaseTimer:
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+        self.start = 0.0
+        self.nested = 0.0
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.monitor.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.monitor.stack
+        stack.pop()
+        self.monitor.current[self.name] += elapsed - self.nested
+        if stack:
+            stack[-1].nested += elapsed
+        return False
+
+
+class PerfMonitor:
+    """
+    Frame timing for the main loop: per-phase times, blit and text counts,
+    kept in a ring buffer of recent frames while enabled. When it is off,
+    phase() returns a shared do-nothing context and nothing is recorded, so
+    the instrumentation costs next to nothing.
+    """
+
+    def __init__(self, history=600, fps=60):
+        self.enabled = False
+        self.budget_ms = 1000 / fps
+        self.samples = deque(maxlen=history)
+        self.timers = {name: PhaseTimer(self, name) for name in PHASES}
+        self.stack = []
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.blits = 0
+        self.frame = 0
+        self.frame_start = None
+        self.text_seen = None
+        self.font = None
+        self.overlay = None
+        self.overlay_drawn = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        # The next end_frame() starts a fresh frame rather than measuring the time spent off
+        self.frame_start = None
+        self.overlay = None
+        return self.enabled
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        return self.timers[name]
+
+    def end_frame(self, state):
+        """Close the current frame's sample."""
+        now = time.perf_counter()
+        stats = text_cache_stats()
+        texts = stats["hits"] + stats["misses"]
+        if self.frame_start is not None:
+            phases = {name: seconds * 1000 for name, seconds in self.current.items()}
+            frame_ms = (now - self.frame_start) * 1000
+            self.samples.append({
+                "frame": self.frame,
+                "state": state,
+                "frame_ms": frame_ms,
+                "work_ms": max(0.0, frame_ms - phases["idle"]),
+                **{f"{name}_ms": ms for name, ms in phases.items()},
+                "blits": self.blits,
+                "texts": texts - self.text_seen[0],
+                "text_renders": stats["misses"] - self.text_seen[1],
+            })
+        self.frame += 1
+        self.frame_start = now
+        self.text_seen = (texts, stats["misses"])
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.blits = 0
+
+    def summary(self):
+        """FPS, frame-time percentiles and average phase times over the buffered frames."""
+        if not self.samples:
+            return None
+        frames = sorted(sample["frame_ms"] for sample in self.samples)
+        count = len(frames)
+        total = sum(frames)
+        result = {
+            "fps": count * 1000 / total if total else 0.0,
+            "p50": frames[count // 2],
+            "p95": frames[min(count - 1, count * 95 // 100)],
+            "p99": frames[min(count - 1, count * 99 // 100)],
+            "max": frames[-1],
+        }
+        for column in CSV_COLUMNS[2:]:
+            if column not in result:
+                result[column] = sum(sample[column] for sample in self.samples) / count
+        return result
+
+    def dump_csv(self, path=None):
+        """Write the buffered frames to a CSV file and return its path."""
+        if path is None:
+            path = time.strftime("perf_%Y%m%d-%H%M%S.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            for sample in self.samples:
+                writer.writerow({key: round(value, 3) if isinstance(value, float) else value
+                                 for key, value in sample.items()})
+        return path
+
+    def draw(self, surface, topleft):
+        """Draw the overlay onto surface and return the rect it covers."""
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_drawn >= OVERLAY_REFRESH_S:
+            self.overlay = self.render_overlay()
+            self.overlay_drawn = now
+        return surface.blit(self.overlay, topleft)
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        overlay = pygame.Surface(OVERLAY_SIZE)
+        overlay.fill((20, 20, 20))
+        summary = self.summary()
+        if summary is None:
+            lines = ["Collecting frame timings..."]
+        else:
+            lines = [
+                f"FPS {summary['fps']:.1f}   frame p50 {summary['p50']:.1f}  p95 {summary['p95']:.1f}  p99 {summary['p99']:.1f} ms",
+                f"work {summary['work_ms']:.2f} ms   idle {summary['idle_ms']:.1f} ms",
+                "   ".join(f"{name} {summary[name + '_ms']:.2f}" for name in ("events", "update", "draw")),
+                "   ".join(f"{name} {summary[name + '_ms']:.2f}" for name in ("ui", "flip", "overlay")),
+                f"blits {summary['blits']:.1f}   text {summary['texts']:.1f} drawn, {summary['text_renders']:.2f} rendered",
+            ]
+        for i, line in enumerate(lines):
+            overlay.blit(self.font.render(line, True, (230, 230, 230)), (6, 6 + i * 18))
+
+        # Rolling graph of each frame's work time (idle excluded), with a line at the frame budget
+        graph = pygame.Rect(6, 6 + 5 * 18 + 4, OVERLAY_SIZE[0] - 12, OVERLAY_SIZE[1] - 5 * 18 - 16)
+        pygame.draw.rect(overlay, (45, 45, 45), graph)
+        recent = list(self.samples)[-GRAPH_FRAMES:]
+        bar_width = graph.width / GRAPH_FRAMES
+        for i, sample in enumerate(recent):
+            ms = sample["work_ms"]
+            height = min(graph.height, int(ms / GRAPH_MAX_MS * graph.height))
+            color = (80, 200, 80) if ms <= self.budget_ms else (220, 200, 60) if ms <= 2 * self.budget_ms else (220, 60, 60)
+            x = graph.x + int(i * bar_width)
+            pygame.draw.rect(overlay, color, (x, graph.bottom - height, max(1, int(bar_width)), height))
+        budget_y = graph.bottom - int(self.budget_ms / GRAPH_MAX_MS * graph.height)
+        pygame.draw.line(overlay, (150, 150, 150), (graph.x, budget_y), (graph.right - 1, budget_y))
+        return overlay
@@ -0,0 +1,157 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL_S = 0.005
+
+
+def frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    A sampling profiler: a background thread records the watched thread's
+    call stack every interval, and the counts are written in the collapsed
+    format flamegraph.pl and speedscope read ("outer;inner;leaf count").
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileCapture:
+    """
+    Profiles the main loop only while it matters: whenever the game is in
+    one of the armed states, or for a set number of frames. Each capture
+    is written to its own timestamped file in out_dir: a .prof file from
+    cProfile, or a .collapsed stack file from the sampler.
+    """
+
+    def __init__(self, mode="cprofile", out_dir="profiles"):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.out_dir = out_dir
+        self.states = set()
+        self.frames_left = 0
+        self.profiler = None
+        self.label = None
+        self.written = []
+
+    @classmethod
+    def from_environment(cls, environ=os.environ):
+        """
+        Arm from RPG_PROFILE_STATES (comma-separated game states) and
+        RPG_PROFILE_FRAMES (profile the first N frames), writing with
+        RPG_PROFILE_MODE (cprofile or sample) to RPG_PROFILE_DIR.
+        """
+        mode = environ.get("RPG_PROFILE_MODE", "cprofile")
+        if mode not in PROFILE_MODES:
+            print(f"Warning: unknown RPG_PROFILE_MODE {mode!r}. Using cprofile.")
+            mode = "cprofile"
+        capture = cls(mode, environ.get("RPG_PROFILE_DIR", "profiles"))
+        capture.states = {state for state in environ.get("RPG_PROFILE_STATES", "").split(",") if state}
+        try:
+            capture.frames_left = int(environ.get("RPG_PROFILE_FRAMES", 0))
+        except ValueError:
+            print("Warning: RPG_PROFILE_FRAMES is not a number. Ignoring it.")
+        return capture
+
+    @property
+    def armed(self):
+        return bool(self.states) or self.frames_left > 0 or self.profiler is not None
+
+    def toggle_state(self, state):
+        """Arm or disarm profiling of a game state. Returns True if it is now armed."""
+        if state in self.states:
+            self.states.discard(state)
+            return False
+        self.states.add(state)
+        return True
+
+    def capture_frames(self, count):
+        self.frames_left = count
+
+    def frame(self, state):
+        """
+        Call at the start of every frame with the current game state. Returns
+        the path of a capture that finished, or None.
+        """
+        wanted = state in self.states or self.frames_left > 0
+        written = None
+        if self.profiler is not None and (not wanted or self.label != self.capture_label(state)):
+            written = self.stop()
+        if wanted and self.profiler is None:
+            self.start(self.capture_label(state))
+        if self.frames_left > 0:
+            self.frames_left -= 1
+        return written
+
+    def capture_label(self, state):
+        # Frame-count captures run across state changes; state captures end with their state
+        return "frames" if self.frames_left > 0 else state
+
+    def start(self, label):
+        self.label = label
+        if self.mode == "sample":
+            self.profiler = StackSampler(threading.get_ident())
+            self.profiler.start()
+            return
+        self.profiler = cProfile.Profile()
+        try:
+            self.profiler.enable()
+        except ValueError as e: # Another profiler already owns this thread
+            print(f"Warning: could not start profiling: {e}")
+            self.profiler = None
+            self.states.clear()
+            self.frames_left = 0
+
+    def stop(self):
+        """Finish the running capture, if any, and return the file it was written to."""
+        if self.profiler is None:
+            return None
+        profiler, self.profiler = self.profiler, None
+        os.makedirs(self.out_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now % 1 * 1000):03d}"
+        if self.mode == "sample":
+            profiler.stop()
+            path = os.path.join(self.out_dir, f"{stamp}_{self.label}.collapsed")
+            profiler.write(path)
+        else:
+            profiler.disable()
+            path = os.path.join(self.out_dir, f"{stamp}_{self.label}.prof")
+            profiler.dump_stats(path)
+        self.written.append(path)
+        return path
@@ -1,10 +1,32 @@
 #!/usr/bin/env python
-print("--- RUNNING PYGAME VERSION ---")
+import time
+IMPORT_STARTED = time.perf_counter()
 import random
 import os
-import json
+import argparse
+import copy
+import pickle
+import zlib
+import sqlite3
 import pygame
 from collections import deque
+from dirty_rects import DirtyRenderer
+from text_cache import get_font, render_text
+from frame_clock import FrameScheduler
+from action_scheduler import ActionScheduler
+from spatial_index import SpatialIndex
+from level_pregen import LevelPregenerator
+from atlas import load_atlas
+from asset_manager import AssetManager, AssetView
+from camera import Camera
+from fov import FieldOfView, ExploredMap
+from pathfinding import DistanceMap, astar
+from enemy_ai import BatchField, EnemyBatch, plan_turn
+from combat_predictor import PREDICTION_TRIALS, predict_combat
+from perf_overlay import PerfMonitor
+from profiler_hooks import ProfileCapture
+from save_game import SaveWriter, read_save
+from highscores import HighscoreStore
 
 # --- Constants ---
 SCREEN_WIDTH = 1280
@@ -16,7 +38,37 @@ ROOM_MAX_SIZE = 8
 ROOM_MIN_SIZE = 4
 MAX_ROOMS = 12
 MAX_DUNGEON_LEVEL = 5
-HIGHSCORE_FILE = "rpg_highscores.json"
+# Endless descent levels are generated and streamed in square chunks
+CHUNK_SIZE = 32
+CHUNK_ROOMS = 4 # Room placement attempts per chunk
+MAX_LOADED_CHUNKS = 16
+ENDLESS_CHUNKS_ACROSS = 1024 # 32768 x 32768 cells; only the chunks near the party are ever in memory
+STAIRS_CHUNK_DISTANCE = 2 # How many chunks from the start the stairs down are
+FOV_RADIUS = 8
+HUNT_RANGE = 8 # Enemies within this many steps of the party come after it
+AGGRO_RANGE = 5 # ...once one of them has come this close
+CLICK_ROUTE_NODES = 2000 # Cells A* may search when routing a click on the map
+STEP_KEYS = {(0, -1): pygame.K_w, (0, 1): pygame.K_s, (-1, 0): pygame.K_a, (1, 0): pygame.K_d}
+FOG_ALPHA = 150 # How dark explored cells outside the party's view are drawn
+FPS = 60
+PERF_OVERLAY_KEY = pygame.K_F3 # Toggles the frame-timing overlay
+PERF_DUMP_KEY = pygame.K_F4 # Saves the overlay's recorded frames to CSV
+PROFILE_FRAMES_KEY = pygame.K_F5 # Profiles the next PROFILE_HOTKEY_FRAMES frames
+PROFILE_STATE_KEY = pygame.K_F6 # Arms or disarms profiling whenever the current game state is active
+PROFILE_HOTKEY_FRAMES = 300
+SAVE_KEY = pygame.K_F7 # Saves the run while exploring
+LOAD_KEY = pygame.K_F8 # Loads the saved run while exploring; L does the same from the main menu
+SAVE_FILE = "rpg_save.dat"
+AUTOSAVE_TURNS = 25 # Exploration turns between autosaves; taking the stairs also autosaves
+ENEMY_TURN_DELAY = 0.5 # Seconds before an enemy acts in combat
+FORECAST_BATCH = 1000 # Fights the combat forecast plays per frame, until it has PREDICTION_TRIALS
+HIGHSCORE_DB = "rpg_highscores.db"
+HIGHSCORE_FILE = "rpg_highscores.json" # The old top-ten list, imported into a new HIGHSCORE_DB
+LEADERBOARD_PAGE = 10 # Scores per leaderboard page
+ASSET_BUDGET_BYTES = 32 * 1024 * 1024 # Unpinned sprites and sounds beyond this are evicted
+
+# Headless mode runs the game logic without a window, audio or sprites
+HEADLESS = os.environ.get("RPG_HEADLESS") == "1"
 
 # --- Colors ---
 WHITE = (255, 255, 255)
@@ -27,24 +79,30 @@ BLUE = (0, 0, 255)
 GRAY = (128, 128, 128)
 YELLOW = (255, 255, 0) # For selection highlight
 
+# --- Screen Regions (used for dirty-rectangle updates) ---
+MAP_AREA = pygame.Rect(0, 0, 800, SCREEN_HEIGHT)
+PARTY_AREA = pygame.Rect(800, 0, SCREEN_WIDTH - 800, SCREEN_HEIGHT - 280)
+MESSAGE_AREA = pygame.Rect(800, SCREEN_HEIGHT - 280, SCREEN_WIDTH - 800, 280)
+SCREEN_AREA = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
 # --- Pygame Setup ---
-pygame.init()
-pygame.mixer.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Python RPG Adventure")
+# Importing this module has no side effects; startup() opens the window and
+# loads assets in phases, filling in these globals as it goes.
+screen = None
 
 # --- Font Setup ---
-try:
-    font = pygame.font.Font("C:/Windows/Fonts/seguiemj.ttf", 28)
-except FileNotFoundError:
-    print("Warning: Segoe UI Emoji font not found. Using default font.")
-    font = pygame.font.Font(None, 32)
+PREFERRED_FONT = ("C:/Windows/Fonts/seguiemj.ttf", 28)
+FONT_FACE = None # pygame's default font until the fonts phase finds the preferred one
+FONT_SIZE = 32
+font = None
 
 # --- Asset Loading ---
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
 
 def load_sprite(path, size=(TILE_SIZE, TILE_SIZE)):
+    if HEADLESS:
+        return None
     try:
         sprite = pygame.image.load(os.path.join(script_dir, path)).convert_alpha()
         return pygame.transform.scale(sprite, size)
@@ -56,14 +114,12 @@ def load_sprite(path, size=(TILE_SIZE, TILE_SIZE)):
 
 # --- Golden UI Assets ---
 from golden_ui_loader import load_ui_elements
-UI_ELEMENTS = load_ui_elements(os.path.join(script_dir, "ui_elements"), scale=2)
-
-# Use golden backgrounds and panels
+UI_ELEMENTS = {}
 
 # Use UI_ELEMENTS for backgrounds and panels
-gold_background = UI_ELEMENTS.get("background") or UI_ELEMENTS.get("main_bg")
-gold_panel = UI_ELEMENTS.get("panel") or UI_ELEMENTS.get("panel_bg")
-ui_panel_background = gold_panel
+gold_background = None
+gold_panel = None
+ui_panel_background = None
 
 # Find a button image from UI_ELEMENTS
 def get_button_images():
@@ -79,8 +135,13 @@ def get_button_images():
         if "button" in k:
             return v, v
     # Fallback: use panel
-    return gold_panel, gold_panel
-button_img, button_img_hover = get_button_images()
+    if gold_panel:
+        return gold_panel, gold_panel
+    # Nothing loaded yet: plain buttons until the UI phase has run
+    plain = pygame.Surface((190, 50))
+    plain.fill(GRAY)
+    return plain, plain
+button_img = button_img_hover = None
 
 
 
@@ -99,7 +160,7 @@ class Button:
     def draw(self, surface):
         current_image = self.hover_image if self.is_hovered else self.image
         surface.blit(current_image, self.rect.topleft)
-        text_surf = font.render(self.text, True, WHITE)
+        text_surf = render_text(self.text, FONT_SIZE, WHITE, face=FONT_FACE)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
 
@@ -107,70 +168,239 @@ class Button:
         if event.type == pygame.MOUSEMOTION:
             self.is_hovered = self.rect.collidepoint(event.pos)
         if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.is_hovered:
-                return True
+            return self.rect.collidepoint(event.pos)
         return False
 
 # --- Sprite Definitions ---
 SPRITE_PATH = os.path.join("assets", "crawl-tiles Oct-5-2010")
-SPRITES = {
-    "player": load_sprite(os.path.join(SPRITE_PATH, "player/base/human_m.png")),
-    "warrior": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/orc_warrior.png")),
-    "mage": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/deep_elf_mage.png")),
-    "archer": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/deep_elf_master_archer.png")),
-    "goblin": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/goblin.png")),
-    "orc": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/orc.png")),
-    "troll": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/troll.png")),
-    "dragon": load_sprite(os.path.join(SPRITE_PATH, "dc-mon/dragon.png")),
-    "potion": load_sprite(os.path.join(SPRITE_PATH, "item/potion/i-heal.png")),
-    "weapon": load_sprite(os.path.join(SPRITE_PATH, "item/weapon/short_sword1.png")),
-    "armor": load_sprite(os.path.join(SPRITE_PATH, "item/armour/leather_armour1.png")),
-    "wall": load_sprite(os.path.join(SPRITE_PATH, "dc-dngn/wall/brick_brown0.png")),
-    "floor": load_sprite(os.path.join(SPRITE_PATH, "dc-dngn/floor/cobble_blood1.png")),
-    "stairs": load_sprite(os.path.join(SPRITE_PATH, "dc-dngn/gateways/stone_stairs_down.png")),
+SPRITE_FILES = {
+    "player": "player/base/human_m.png",
+    "warrior": "dc-mon/orc_warrior.png",
+    "mage": "dc-mon/deep_elf_mage.png",
+    "archer": "dc-mon/deep_elf_master_archer.png",
+    "goblin": "dc-mon/goblin.png",
+    "orc": "dc-mon/orc.png",
+    "troll": "dc-mon/troll.png",
+    "dragon": "dc-mon/dragon.png",
+    "potion": "item/potion/i-heal.png",
+    "weapon": "item/weapon/short_sword1.png",
+    "armor": "item/armour/leather_armour1.png",
+    "wall": "dc-dngn/wall/brick_brown0.png",
+    "floor": "dc-dngn/floor/cobble_blood1.png",
+    "stairs": "dc-dngn/gateways/stone_stairs_down.png",
 }
+# Built by `python atlas.py`; sprites missing from it are loaded one file at a time
+SPRITE_ATLAS = f"sprites_{TILE_SIZE}"
+SOUND_FILES = {
+    "sword": "sword.wav",
+    "magic": "magic.wav",
+    "arrow": "arrow.wav",
+    "damage": "damage.wav",
+}
+
+# --- Asset Manager ---
+# Sprites and sounds load on first use; each level pins the ones it needs
+ASSETS = AssetManager(ASSET_BUDGET_BYTES)
+
+def load_tile_sprite(name):
+    sheet = ASSETS.get("atlas:" + SPRITE_ATLAS)
+    if sheet and name in sheet:
+        return sheet[name]
+    return load_sprite(os.path.join(SPRITE_PATH, SPRITE_FILES[name]))
+
+def load_sound(name):
+    if HEADLESS or not pygame.mixer.get_init():
+        return None
+    try:
+        return pygame.mixer.Sound(os.path.join("assets", SOUND_FILES[name]))
+    except (pygame.error, FileNotFoundError):
+        return None
 
+ASSETS.register("atlas:" + SPRITE_ATLAS, lambda: None if HEADLESS else load_atlas(SPRITE_ATLAS))
+ASSETS.pin("atlas:" + SPRITE_ATLAS) # Atlas subsurfaces keep the sheet alive anyway
+for sprite_name in SPRITE_FILES:
+    ASSETS.register("sprite:" + sprite_name, lambda name=sprite_name: load_tile_sprite(name))
+for sound_name in SOUND_FILES:
+    ASSETS.register("sound:" + sound_name, lambda name=sound_name: load_sound(name))
+SPRITES = AssetView(ASSETS, "sprite:")
+SOUNDS = AssetView(ASSETS, "sound:")
+CLASS_SKILL_SOUNDS = {"warrior": "sword", "mage": "magic", "archer": "arrow"}
 
-# --- Sound Assets ---
+def play_sound(name):
+    sound = SOUNDS[name]
+    if sound:
+        sound.play()
+
+
+# --- Music ---
 music_loaded = False
-try:
-    pygame.mixer.music.load(os.path.join("assets", "music.ogg"))
-    music_loaded = True
-    sword_sound = pygame.mixer.Sound(os.path.join("assets", "sword.wav"))
-    magic_sound = pygame.mixer.Sound(os.path.join("assets", "magic.wav"))
-    arrow_sound = pygame.mixer.Sound(os.path.join("assets", "arrow.wav"))
-    damage_sound = pygame.mixer.Sound(os.path.join("assets", "damage.wav"))
-except pygame.error:
-    print("Warning: Could not load sound assets. Game will run without sound.")
-    sword_sound = None
-    magic_sound = None
-    arrow_sound = None
-    damage_sound = None
+
+# --- Startup ---
+def init_display():
+    global screen, button_img, button_img_hover
+    if HEADLESS:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    # Only what the first frame needs; the mixer waits for the audio phase
+    pygame.display.init()
+    pygame.font.init()
+    if HEADLESS:
+        return
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Python RPG Adventure")
+    button_img, button_img_hover = get_button_images()
+
+def init_fonts():
+    global font, FONT_FACE, FONT_SIZE
+    if HEADLESS:
+        return
+    try:
+        font = get_font(*PREFERRED_FONT)
+        FONT_FACE, FONT_SIZE = PREFERRED_FONT
+    except FileNotFoundError:
+        print("Warning: Segoe UI Emoji font not found. Using default font.")
+        font = get_font(FONT_FACE, FONT_SIZE)
+
+def init_ui():
+    global UI_ELEMENTS, gold_background, gold_panel, ui_panel_background, button_img, button_img_hover
+    if HEADLESS:
+        return
+    UI_ELEMENTS = load_ui_elements(os.path.join(script_dir, "ui_elements"), scale=2)
+    gold_background = UI_ELEMENTS.get("background") or UI_ELEMENTS.get("main_bg")
+    gold_panel = UI_ELEMENTS.get("panel") or UI_ELEMENTS.get("panel_bg")
+    ui_panel_background = gold_panel
+    button_img, button_img_hover = get_button_images()
+
+def init_sprites():
+    # Sprites load on first use anyway; this phase just gets it over with up front
+    if HEADLESS:
+        return
+    for sprite_name in SPRITE_FILES:
+        SPRITES[sprite_name]
+
+def init_audio():
+    global music_loaded
+    if HEADLESS:
+        return
+    try:
+        pygame.mixer.init()
+        pygame.mixer.music.load(os.path.join("assets", "music.ogg"))
+        music_loaded = True
+    except pygame.error:
+        print("Warning: Could not load sound assets. Game will run without sound.")
+    # Sounds asked for before the mixer was up were cached as silent
+    for sound_name in SOUND_FILES:
+        ASSETS.unload("sound:" + sound_name)
+
+STARTUP_PHASES = [
+    ("display", init_display),
+    ("fonts", init_fonts),
+    ("ui", init_ui),
+    ("sprites", init_sprites),
+    ("audio", init_audio),
+]
+# Not needed for the first frame, so by default they run right after it
+DEFAULT_DEFERRED_PHASES = ("sprites", "audio")
+startup_timings = {} # phase name -> {"ms": wall time, "deferred": bool}
+startup_info = {"started": None, "first_frame": None}
+pending_phases = []
+
+def run_startup_phase(name, phase, deferred):
+    start = time.perf_counter()
+    phase()
+    startup_timings[name] = {"ms": (time.perf_counter() - start) * 1000, "deferred": deferred}
+
+def startup(defer=DEFAULT_DEFERRED_PHASES):
+    """
+    Initialise pygame and load assets, phase by phase. Phases named in
+    `defer` are held back until finish_startup(); everything but the
+    display can be deferred. Calling it again does nothing.
+    """
+    if startup_info["started"] is not None:
+        return
+    check_deferred(defer)
+    startup_info["started"] = time.perf_counter()
+    for name, phase in STARTUP_PHASES:
+        if name in defer:
+            pending_phases.append((name, phase))
+        else:
+            run_startup_phase(name, phase, False)
+
+def check_deferred(defer):
+    if "display" in defer:
+        raise ValueError("The display phase cannot be deferred")
+    unknown = set(defer) - {name for name, _ in STARTUP_PHASES}
+    if unknown:
+        raise ValueError(f"Unknown startup phase(s): {', '.join(sorted(unknown))}")
+
+def deferred_phases_arg(text):
+    # --defer's comma-separated phases, checked while parsing so a typo is a usage error
+    names = [name for name in text.split(",") if name]
+    try:
+        check_deferred(names)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return names
+
+def finish_startup():
+    """Run any deferred startup phases. Returns True if there were any."""
+    ran = bool(pending_phases)
+    while pending_phases:
+        name, phase = pending_phases.pop(0)
+        run_startup_phase(name, phase, True)
+    return ran
+
+def mark_first_frame():
+    if startup_info["first_frame"] is None:
+        startup_info["first_frame"] = time.perf_counter()
+
+def startup_report():
+    lines = ["Startup profile:"]
+    if startup_info["started"] is not None:
+        lines.append(f"  {'import':<10}{(startup_info['started'] - IMPORT_STARTED) * 1000:8.1f} ms")
+    for name, _ in STARTUP_PHASES:
+        timing = startup_timings.get(name)
+        if timing is None:
+            lines.append(f"  {name:<10}{'-':>8}    (pending)")
+        else:
+            note = "    (deferred)" if timing["deferred"] else ""
+            lines.append(f"  {name:<10}{timing['ms']:8.1f} ms{note}")
+    if startup_info["first_frame"] is not None:
+        lines.append(f"  time to first frame: {(startup_info['first_frame'] - IMPORT_STARTED) * 1000:.1f} ms from the start of import")
+    return "\n".join(lines)
 
 # --- Character Classes ---
 CLASSES = {
-    "warrior": {"hp": 120, "attack": 15, "defense": 10, "sprite": SPRITES["warrior"], "weapon": "Sword", "mana": 0},
-    "mage": {"hp": 80, "attack": 20, "defense": 5, "sprite": SPRITES["mage"], "weapon": "Staff", "mana": 20},
-    "archer": {"hp": 100, "attack": 12, "defense": 8, "sprite": SPRITES["archer"], "weapon": "Bow", "mana": 0}
+    "warrior": {"hp": 120, "attack": 15, "defense": 10, "sprite": "warrior", "weapon": "Sword", "mana": 0},
+    "mage": {"hp": 80, "attack": 20, "defense": 5, "sprite": "mage", "weapon": "Staff", "mana": 20},
+    "archer": {"hp": 100, "attack": 12, "defense": 8, "sprite": "archer", "weapon": "Bow", "mana": 0}
 }
 
 # --- Enemy Types ---
+# move_delay: turns an enemy waits after each step while hunting
 ENEMIES = {
-    "goblin": {"hp": 30, "attack": 8, "defense": 2, "xp": 50, "sprite": SPRITES["goblin"]},
-    "orc": {"hp": 50, "attack": 12, "defense": 4, "xp": 100, "sprite": SPRITES["orc"]},
-    "troll": {"hp": 80, "attack": 15, "defense": 6, "xp": 150, "sprite": SPRITES["troll"]},
-    "dragon": {"hp": 250, "attack": 25, "defense": 15, "xp": 1000, "sprite": SPRITES["dragon"]}
+    "goblin": {"hp": 30, "attack": 8, "defense": 2, "xp": 50, "sprite": "goblin", "move_delay": 0},
+    "orc": {"hp": 50, "attack": 12, "defense": 4, "xp": 100, "sprite": "orc", "move_delay": 0},
+    "troll": {"hp": 80, "attack": 15, "defense": 6, "xp": 150, "sprite": "troll", "move_delay": 1},
+    "dragon": {"hp": 250, "attack": 25, "defense": 15, "xp": 1000, "sprite": "dragon", "move_delay": 1}
 }
+# Kept as a list so seeded generation picks the same enemies in every process
+SPAWNABLE_ENEMIES = [name for name in ENEMIES if name != "dragon"]
+ENEMY_TEMPLATES = {} # enemy type -> attributes of a fresh enemy, filled in by Enemy.restored
 
 # --- Items ---
 class Item:
-    def __init__(self, name, sprite):
+    def __init__(self, name, sprite_name):
         self.name = name
-        self.sprite = sprite
+        self.sprite_name = sprite_name
+
+    @property
+    def sprite(self):
+        return SPRITES[self.sprite_name]
 
 class Potion(Item):
     def __init__(self, name, hp_gain):
-        super().__init__(name, SPRITES["potion"])
+        super().__init__(name, "potion")
         self.hp_gain = hp_gain
 
     def use(self, target):
@@ -179,14 +409,18 @@ class Potion(Item):
 
 class Weapon(Item):
     def __init__(self, name, attack_bonus):
-        super().__init__(name, SPRITES["weapon"])
+        super().__init__(name, "weapon")
         self.attack_bonus = attack_bonus
 
 class Armor(Item):
     def __init__(self, name, defense_bonus):
-        super().__init__(name, SPRITES["armor"])
+        super().__init__(name, "armor")
         self.defense_bonus = defense_bonus
 
+# Item classes by the kind number save files store; each is built from (name, value)
+ITEM_KINDS = [(Potion, "hp_gain"), (Weapon, "attack_bonus"), (Armor, "defense_bonus")]
+ITEM_KIND_OF = {cls: kind for kind, (cls, _) in enumerate(ITEM_KINDS)}
+
 # --- Pre-defined Items ---
 WEAPONS = [
     Weapon("Dagger", 3),
@@ -203,7 +437,7 @@ ARMOR = [
 
 # --- Entities ---
 class Entity:
-    def __init__(self, x, y, name, hp, attack, defense, sprite):
+    def __init__(self, x, y, name, hp, attack, defense, sprite_name):
         self.x = x
         self.y = y
         self.name = name
@@ -211,7 +445,11 @@ class Entity:
         self.base_defense = defense
         self.max_hp = hp
         self.hp = hp
-        self.sprite = sprite
+        self.sprite_name = sprite_name
+
+    @property
+    def sprite(self):
+        return SPRITES[self.sprite_name]
 
     @property
     def attack(self):
@@ -227,8 +465,8 @@ class Entity:
         return self.hp > 0
 
     def take_damage(self, damage):
-        if damage > 0 and damage_sound:
-            damage_sound.play()
+        if damage > 0:
+            play_sound("damage")
         self.hp -= damage
         if self.hp < 0:
             self.hp = 0
@@ -264,10 +502,42 @@ class Player(Entity):
         return f'\n{self.name} leveled up to level {self.level}! Stats increased.'
 
 class Enemy(Entity):
+    # On a level, position, HP and hunting state are views onto the level's EnemyBatch arrays
+    batch = None
+    slot = -1
+    x = BatchField("xs")
+    y = BatchField("ys")
+    hp = BatchField("hp")
+    cooldown = BatchField("cooldown")
+    aggro = BatchField("aggro")
+
     def __init__(self, x, y, enemy_type):
+        self.enemy_type = enemy_type
+        self.move_delay = ENEMIES[enemy_type]["move_delay"]
+        self.cooldown = 0
+        self.aggro = 0
         super().__init__(x, y, enemy_type.capitalize(), ENEMIES[enemy_type]["hp"], ENEMIES[enemy_type]["attack"], ENEMIES[enemy_type]["defense"], ENEMIES[enemy_type]["sprite"])
         self.xp = ENEMIES[enemy_type]["xp"]
 
+    @classmethod
+    def restored(cls, enemy_type, x, y, hp, cooldown=0, aggro=0):
+        # Loading a save builds thousands of these, so copy a per-type template instead of running __init__
+        template = ENEMY_TEMPLATES.get(enemy_type)
+        if template is None:
+            template = ENEMY_TEMPLATES[enemy_type] = cls(0, 0, enemy_type).__dict__
+        enemy = cls.__new__(cls)
+        enemy.__dict__.update(template)
+        enemy.__dict__.update(_x=x, _y=y, _hp=hp, _cooldown=cooldown, _aggro=aggro)
+        return enemy
+
+    def __getstate__(self):
+        # Pickle as a standalone enemy, with its batch values copied back onto it
+        state = self.__dict__.copy()
+        if self.batch is not None:
+            state.update(_x=self.x, _y=self.y, _hp=self.hp, _cooldown=self.cooldown, _aggro=self.aggro)
+            del state["batch"], state["slot"]
+        return state
+
 # --- Map Generation ---
 class Rect:
     def __init__(self, x, y, w, h):
@@ -285,36 +555,131 @@ class Rect:
         return (self.x1 <= other.x2 and self.x2 >= other.x1 and
                 self.y1 <= other.y2 and self.y2 >= other.y1)
 
+# --- Tiles ---
+# Dungeon maps store one byte per cell; the ID indexes this table
+TILE_WALL = 0
+TILE_FLOOR = 1
+TILE_STAIRS = 2
+TILE_TYPES = [
+    {"name": "wall", "sprite": "wall", "walkable": False, "transparent": False},
+    {"name": "floor", "sprite": "floor", "walkable": True, "transparent": True},
+    {"name": "stairs", "sprite": "stairs", "walkable": True, "transparent": True},
+]
+WALKABLE = bytes(tile["walkable"] for tile in TILE_TYPES)
+TRANSPARENT = bytes(tile["transparent"] for tile in TILE_TYPES)
+
 class Dungeon:
-    def __init__(self, width, height, level):
+    def __init__(self, width, height, level, seed=None):
         self.width = width
         self.height = height
         self.level = level
-        self.grid = [[SPRITES["wall"] for _ in range(width)] for _ in range(height)]
+        # Generation draws only from this RNG, so a seed always gives the same level
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tiles = bytearray([TILE_WALL]) * (width * height)
         self.rooms = []
         self.items = []
         self.enemies = []
         self.stairs_down = None
+        self.revision = 0
+        self.tile_changes = [] # (x, y) of every set_tile, so path maps can update incrementally
+        self.explored = ExploredMap()
+        self.enemy_batch = EnemyBatch()
+        self.enemy_index = SpatialIndex()
+        self.item_index = SpatialIndex()
+        self.player_index = SpatialIndex()
+
+    # --- Occupancy ---
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        self.enemy_batch.attach(enemy)
+        self.enemy_index.add(enemy)
+
+    def remove_enemy(self, enemy):
+        if self.enemy_index.remove(enemy):
+            self.enemies.remove(enemy)
+            self.enemy_batch.detach(enemy)
+
+    def move_enemy(self, enemy, x, y):
+        self.enemy_index.move(enemy, x, y)
+
+    def add_item(self, item, x, y):
+        item.x = x
+        item.y = y
+        self.items.append(item)
+        self.item_index.add(item)
+
+    def remove_item(self, item):
+        if self.item_index.remove(item):
+            self.items.remove(item)
+
+    def place_player(self, player, x, y):
+        self.player_index.remove(player)
+        player.x = x
+        player.y = y
+        self.player_index.add(player)
+
+    def move_player(self, player, x, y):
+        self.player_index.move(player, x, y)
+
+    def enemies_at(self, x, y):
+        return self.enemy_index.at(x, y)
+
+    def items_at(self, x, y):
+        return self.item_index.at(x, y)
+
+    def players_at(self, x, y):
+        return self.player_index.at(x, y)
+
+    def entities_at(self, x, y):
+        return self.players_at(x, y) + self.enemies_at(x, y) + self.items_at(x, y)
+
+    def entities_within(self, x, y, radius):
+        return (self.player_index.within(x, y, radius) + self.enemy_index.within(x, y, radius)
+                + self.item_index.within(x, y, radius))
+
+    def focus(self, x, y):
+        """Called as the party moves. A fixed-size level is already all in memory."""
+        pass
+
+    # --- Tiles ---
+    def tile_at(self, x, y):
+        return self.tiles[y * self.width + x]
+
+    def set_tile(self, x, y, tile):
+        self.tiles[y * self.width + x] = tile
+        self.tile_changes.append((x, y))
+        self.revision += 1
+
+    def is_walkable(self, x, y):
+        return WALKABLE[self.tiles[y * self.width + x]]
+
+    def is_transparent(self, x, y):
+        return TRANSPARENT[self.tiles[y * self.width + x]]
+
+    def fill_row(self, x1, x2, y, tile):
+        # Carve cells x1..x2-1 of row y with one slice assignment
+        start = y * self.width
+        self.tiles[start + x1:start + x2] = bytes([tile]) * (x2 - x1)
 
     def create_room(self, room):
-        for x in range(room.x1 + 1, room.x2):
-            for y in range(room.y1 + 1, room.y2):
-                self.grid[y][x] = SPRITES["floor"]
+        for y in range(room.y1 + 1, room.y2):
+            self.fill_row(room.x1 + 1, room.x2, y, TILE_FLOOR)
 
     def create_h_tunnel(self, x1, x2, y):
-        for x in range(min(x1, x2), max(x1, x2) + 1):
-            self.grid[y][x] = SPRITES["floor"]
+        self.fill_row(min(x1, x2), max(x1, x2) + 1, y, TILE_FLOOR)
 
     def create_v_tunnel(self, y1, y2, x):
-        for y in range(min(y1, y2), max(y1, y2) + 1):
-            self.grid[y][x] = SPRITES["floor"]
+        # A column is a strided slice of the flat row-major array
+        top, bottom = min(y1, y2), max(y1, y2)
+        self.tiles[top * self.width + x:bottom * self.width + x + 1:self.width] = bytes([TILE_FLOOR]) * (bottom - top + 1)
 
     def generate(self):
         for _ in range(MAX_ROOMS):
-            w = random.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
-            h = random.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
-            x = random.randint(0, self.width - w - 1)
-            y = random.randint(0, self.height - h - 1)
+            w = self.rng.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+            h = self.rng.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+            x = self.rng.randint(0, self.width - w - 1)
+            y = self.rng.randint(0, self.height - h - 1)
 
             new_room = Rect(x, y, w, h)
             if any(new_room.intersects(other_room) for other_room in self.rooms):
@@ -325,7 +690,7 @@ class Dungeon:
 
             if self.rooms:
                 (prev_x, prev_y) = self.rooms[-1].center()
-                if random.randint(0, 1) == 1:
+                if self.rng.randint(0, 1) == 1:
                     self.create_h_tunnel(prev_x, new_x, prev_y)
                     self.create_v_tunnel(prev_y, new_y, new_x)
                 else:
@@ -338,49 +703,294 @@ class Dungeon:
         if self.level < MAX_DUNGEON_LEVEL:
             last_room = self.rooms[-1]
             self.stairs_down = last_room.center()
-            self.grid[self.stairs_down[1]][self.stairs_down[0]] = SPRITES["stairs"]
+            self.set_tile(self.stairs_down[0], self.stairs_down[1], TILE_STAIRS)
         else: # Boss level
             boss_room = self.rooms[-1]
             boss_x, boss_y = boss_room.center()
-            self.enemies.append(Enemy(boss_x, boss_y, "dragon"))
+            self.add_enemy(Enemy(boss_x, boss_y, "dragon"))
+        self.revision += 1
 
     def place_content(self, room):
-        num_enemies = random.randint(0, 3)
+        num_enemies = self.rng.randint(0, 3)
         for _ in range(num_enemies):
-            x = random.randint(room.x1 + 1, room.x2 - 1)
-            y = random.randint(room.y1 + 1, room.y2 - 1)
-            if not any(e.x == x and e.y == y for e in self.enemies):
-                enemy_type = random.choice(list(ENEMIES.keys() - {'dragon'}))
-                self.enemies.append(Enemy(x, y, enemy_type))
+            x = self.rng.randint(room.x1 + 1, room.x2 - 1)
+            y = self.rng.randint(room.y1 + 1, room.y2 - 1)
+            if not self.enemies_at(x, y):
+                enemy_type = self.rng.choice(SPAWNABLE_ENEMIES)
+                self.add_enemy(Enemy(x, y, enemy_type))
         
-        num_items = random.randint(0, 2)
+        num_items = self.rng.randint(0, 2)
         for _ in range(num_items):
-            x = random.randint(room.x1 + 1, room.x2 - 1)
-            y = random.randint(room.y1 + 1, room.y2 - 1)
-            if not any(i.x == x and i.y == y for i in self.items):
-                item_choice = random.random()
+            x = self.rng.randint(room.x1 + 1, room.x2 - 1)
+            y = self.rng.randint(room.y1 + 1, room.y2 - 1)
+            if not self.items_at(x, y):
+                item_choice = self.rng.random()
+                # Copy the shared WEAPONS/ARMOR entries so each placed item is its own object
                 if item_choice < 0.4:
                     item = Potion("Health Potion", 20)
                 elif item_choice < 0.7:
-                    item = random.choice(WEAPONS)
+                    item = copy.copy(self.rng.choice(WEAPONS))
                 else:
-                    item = random.choice(ARMOR)
-                item.x = x
-                item.y = y
-                self.items.append(item)
+                    item = copy.copy(self.rng.choice(ARMOR))
+                self.add_item(item, x, y)
+
+    def generate_chunk(self, doors, stairs):
+        """
+        Carve one chunk of an endless level: a few rooms, joined to each door
+        cell on the chunk's edge so they line up with the neighbouring chunks.
+        """
+        for _ in range(CHUNK_ROOMS):
+            w = self.rng.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+            h = self.rng.randint(ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+            x = self.rng.randint(0, self.width - w - 1)
+            y = self.rng.randint(0, self.height - h - 1)
+
+            new_room = Rect(x, y, w, h)
+            if any(new_room.intersects(other_room) for other_room in self.rooms):
+                continue
+
+            self.create_room(new_room)
+            (new_x, new_y) = new_room.center()
+            if self.rooms:
+                (prev_x, prev_y) = self.rooms[-1].center()
+                self.create_h_tunnel(prev_x, new_x, prev_y)
+                self.create_v_tunnel(prev_y, new_y, new_x)
+            self.place_content(new_room)
+            self.rooms.append(new_room)
+
+        hub_x, hub_y = self.rooms[0].center()
+        for door_x, door_y in doors:
+            # Approach along the door's own row or column so the tunnel meets the edge at the door
+            if door_x in (0, self.width - 1):
+                self.create_v_tunnel(hub_y, door_y, hub_x)
+                self.create_h_tunnel(hub_x, door_x, door_y)
+            else:
+                self.create_h_tunnel(hub_x, door_x, hub_y)
+                self.create_v_tunnel(hub_y, door_y, door_x)
+
+        if stairs:
+            self.stairs_down = self.rooms[-1].center()
+            self.set_tile(self.stairs_down[0], self.stairs_down[1], TILE_STAIRS)
+        self.revision += 1
+
+class ChunkedDungeon(Dungeon):
+    """
+    An endless level. There is no flat tile array: the map is split into
+    CHUNK_SIZE square chunks, each generated from (seed, chunk coordinate)
+    when the party comes near, so any chunk can be rebuilt identically at
+    any time. At most MAX_LOADED_CHUNKS are kept; the farthest are evicted
+    first, and a chunk that changed (an enemy killed, an item taken) is
+    pickled on eviction and restored instead of regenerated.
+    """
+
+    def __init__(self, level, seed=None, chunks_across=ENDLESS_CHUNKS_ACROSS, max_chunks=MAX_LOADED_CHUNKS):
+        super().__init__(0, 0, level, seed)
+        self.width = self.height = chunks_across * CHUNK_SIZE
+        self.chunks_across = chunks_across
+        self.max_chunks = max_chunks
+        self.chunks = {} # (cx, cy) -> Dungeon holding that chunk's tiles in local coordinates
+        self.saved = {} # (cx, cy) -> compressed pickle of an evicted chunk that had changed
+        self.changed_chunks = set()
+        self.generated = 0
+
+        start = chunks_across // 2
+        layout = random.Random(f"{seed}:layout")
+        ring = [(dx, dy) for dy in range(-STAIRS_CHUNK_DISTANCE, STAIRS_CHUNK_DISTANCE + 1)
+                for dx in range(-STAIRS_CHUNK_DISTANCE, STAIRS_CHUNK_DISTANCE + 1)
+                if max(abs(dx), abs(dy)) == STAIRS_CHUNK_DISTANCE]
+        dx, dy = layout.choice(ring)
+        self.stairs_chunk = (start + dx, start + dy)
+
+        ox, oy = start * CHUNK_SIZE, start * CHUNK_SIZE
+        self.rooms = [Rect(r.x1 + ox, r.y1 + oy, r.x2 - r.x1, r.y2 - r.y1) for r in self.chunk(start, start).rooms]
+        sx, sy = self.chunk(*self.stairs_chunk).stairs_down
+        self.stairs_down = (self.stairs_chunk[0] * CHUNK_SIZE + sx, self.stairs_chunk[1] * CHUNK_SIZE + sy)
+
+    # --- Chunks ---
+    def chunk(self, cx, cy):
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None:
+            chunk = self.load_chunk(cx, cy)
+        return chunk
+
+    def load_chunk(self, cx, cy):
+        key = (cx, cy)
+        if key in self.saved:
+            chunk, enemies, items = pickle.loads(zlib.decompress(self.saved.pop(key)))
+            # Still differs from what generation would give, so save it again on eviction
+            self.changed_chunks.add(key)
+        else:
+            chunk = Dungeon(CHUNK_SIZE, CHUNK_SIZE, self.level, f"{self.seed}:{cx}:{cy}")
+            chunk.generate_chunk(self.chunk_doors(cx, cy), key == self.stairs_chunk)
+            chunk.rng = None
+            ox, oy = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+            enemies, items = chunk.enemies, chunk.items
+            chunk.enemy_batch.detach_all()
+            chunk.enemies, chunk.items = [], []
+            for entity in enemies + items:
+                entity.x += ox
+                entity.y += oy
+            self.generated += 1
+        # Straight into the level's lists and indexes; loading is not a change
+        for enemy in enemies:
+            Dungeon.add_enemy(self, enemy)
+        for item in items:
+            Dungeon.add_item(self, item, item.x, item.y)
+        self.chunks[key] = chunk
+        return chunk
+
+    def chunk_doors(self, cx, cy):
+        # Door cells sit mid-edge on every side that has a neighbour
+        mid, last = CHUNK_SIZE // 2, CHUNK_SIZE - 1
+        doors = []
+        if cx > 0:
+            doors.append((0, mid))
+        if cx < self.chunks_across - 1:
+            doors.append((last, mid))
+        if cy > 0:
+            doors.append((mid, 0))
+        if cy < self.chunks_across - 1:
+            doors.append((mid, last))
+        return doors
+
+    def evict_chunk(self, cx, cy):
+        key = (cx, cy)
+        x1, y1 = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+        enemies = self.enemy_index.in_rect(x1, y1, x1 + CHUNK_SIZE, y1 + CHUNK_SIZE)
+        items = self.item_index.in_rect(x1, y1, x1 + CHUNK_SIZE, y1 + CHUNK_SIZE)
+        for enemy in enemies:
+            Dungeon.remove_enemy(self, enemy)
+        for item in items:
+            Dungeon.remove_item(self, item)
+        chunk = self.chunks.pop(key)
+        if key in self.changed_chunks:
+            self.changed_chunks.discard(key)
+            self.saved[key] = zlib.compress(pickle.dumps((chunk, enemies, items)))
+
+    def focus(self, x, y):
+        """Load the chunks around (x, y) and evict the farthest ones beyond the cache size."""
+        cx, cy = x // CHUNK_SIZE, y // CHUNK_SIZE
+        for ny in range(max(cy - 1, 0), min(cy + 2, self.chunks_across)):
+            for nx in range(max(cx - 1, 0), min(cx + 2, self.chunks_across)):
+                self.chunk(nx, ny)
+        if len(self.chunks) > self.max_chunks:
+            by_distance = sorted(self.chunks, key=lambda k: max(abs(k[0] - cx), abs(k[1] - cy)), reverse=True)
+            for key in by_distance[:len(self.chunks) - self.max_chunks]:
+                if max(abs(key[0] - cx), abs(key[1] - cy)) > 1:
+                    self.evict_chunk(*key)
+
+    def mark_changed(self, x, y):
+        self.changed_chunks.add((x // CHUNK_SIZE, y // CHUNK_SIZE))
+
+    def changed_chunk_contents(self):
+        """
+        (cx, cy, tiles, enemies, items) for every loaded chunk that differs
+        from what generation gives. Changed chunks that were evicted are
+        the compressed pickles in self.saved.
+        """
+        for cx, cy in self.changed_chunks:
+            if (cx, cy) in self.chunks:
+                x1, y1 = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+                yield (cx, cy, bytes(self.chunks[(cx, cy)].tiles),
+                       self.enemy_index.in_rect(x1, y1, x1 + CHUNK_SIZE, y1 + CHUNK_SIZE),
+                       self.item_index.in_rect(x1, y1, x1 + CHUNK_SIZE, y1 + CHUNK_SIZE))
+
+    def restore_chunk(self, cx, cy, tiles, enemies, items):
+        """Put back a changed chunk from a save game; it loads like any evicted chunk once the party comes near."""
+        if (cx, cy) in self.chunks:
+            self.evict_chunk(cx, cy)
+        chunk = Dungeon(CHUNK_SIZE, CHUNK_SIZE, self.level, f"{self.seed}:{cx}:{cy}")
+        chunk.tiles[:] = tiles
+        chunk.rng = None
+        self.saved[(cx, cy)] = zlib.compress(pickle.dumps((chunk, enemies, items)))
+
+    def stats(self):
+        return {"loaded": len(self.chunks), "generated": self.generated, "saved": len(self.saved),
+                "saved_bytes": sum(len(data) for data in self.saved.values())}
+
+    # --- Occupancy ---
+    def remove_enemy(self, enemy):
+        super().remove_enemy(enemy)
+        self.mark_changed(enemy.x, enemy.y)
+
+    def move_enemy(self, enemy, x, y):
+        self.mark_changed(enemy.x, enemy.y)
+        super().move_enemy(enemy, x, y)
+        self.mark_changed(x, y)
+
+    def add_item(self, item, x, y):
+        super().add_item(item, x, y)
+        self.mark_changed(x, y)
+
+    def remove_item(self, item):
+        super().remove_item(item)
+        self.mark_changed(item.x, item.y)
+
+    # --- Tiles ---
+    def tile_at(self, x, y):
+        return self.chunk(x // CHUNK_SIZE, y // CHUNK_SIZE).tiles[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE]
+
+    def set_tile(self, x, y, tile):
+        self.chunk(x // CHUNK_SIZE, y // CHUNK_SIZE).tiles[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE] = tile
+        self.tile_changes.append((x, y))
+        self.mark_changed(x, y)
+        self.revision += 1
+
+    def is_walkable(self, x, y):
+        return WALKABLE[self.tile_at(x, y)]
+
+    def is_transparent(self, x, y):
+        return TRANSPARENT[self.tile_at(x, y)]
+
+def build_dungeon(level, seed):
+    dungeon = Dungeon(MAP_WIDTH, MAP_HEIGHT, level, seed)
+    dungeon.generate()
+    return dungeon
+
+def build_endless_dungeon(level, seed):
+    return ChunkedDungeon(level, seed)
+
+# --- Save Records ---
+def enemy_record(enemy):
+    return (enemy.enemy_type, enemy.x, enemy.y, enemy.hp, enemy.cooldown, enemy.aggro)
+
+def item_record(item):
+    kind = ITEM_KIND_OF[type(item)]
+    return (kind, item.name, getattr(item, ITEM_KINDS[kind][1]))
+
+def unpack_evicted_chunks(snapshot):
+    """Turn the compressed evicted chunks a snapshot carries into chunk records. Runs on the save thread."""
+    items = snapshot["items"]
+    level = snapshot["level"]
+    for (cx, cy), data in level.pop("evicted_chunks", ()):
+        chunk, enemies, chunk_items = pickle.loads(zlib.decompress(data))
+        floor_items = []
+        for item in chunk_items:
+            # Copies of their own, so they are never shared with an item already listed
+            floor_items.append((len(items), item.x, item.y))
+            items.append(item_record(item))
+        level["chunks"].append((cx, cy, bytes(chunk.tiles), [enemy_record(e) for e in enemies], floor_items))
 
 # --- Game ---
 class Game:
+    # Build the next level on a worker thread while the current one is played
+    PREGENERATE_LEVELS = True
+    # Endless descent: streamed chunked levels, stairs down on every one and no final boss
+    ENDLESS = False
+    # Save the run to SAVE_FILE every AUTOSAVE_TURNS turns and on each new level
+    AUTOSAVE = True
+
     def main_menu(self):
-        from ui import UIManager
-        ui = UIManager(screen, font, SCREEN_WIDTH, SCREEN_HEIGHT)
-        waiting = True
+        if self.menu_ui is None:
+            from ui import UIManager
+            self.menu_ui = UIManager(screen, font or get_font(FONT_FACE, FONT_SIZE), SCREEN_WIDTH, SCREEN_HEIGHT)
+        ui = self.menu_ui
         button_rects = {
             "play": pygame.Rect(SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2 - 60, 220, 60),
             "options": pygame.Rect(SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2 + 10, 220, 60),
             "quit": pygame.Rect(SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2 + 80, 220, 60)
         }
-        while waiting and not self.game_over:
+        if self.renderer.changed("screen", None, SCREEN_AREA):
             ui.draw_background()
             ui.draw_panel(SCREEN_WIDTH // 2 + 120, SCREEN_HEIGHT // 2 - 10, center=True)
             ui.draw_text("HEROES", SCREEN_WIDTH // 2 + 120, SCREEN_HEIGHT // 2 - 60, size=64)
@@ -389,29 +999,34 @@ class Game:
             ui.draw_button(ui.button_green, ui.icon_play, "PLAY", SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2 - 60)
             ui.draw_button(ui.button_blue, ui.icon_options, "OPTIONS", SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2 + 10)
             ui.draw_button(ui.button_red, ui.icon_quit, "QUIT", SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2 + 80)
-            pygame.display.flip()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+        for event in self.get_events():
+            if event.type == pygame.QUIT:
+                self.game_over = True
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_q:
                     self.game_over = True
-                    waiting = False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_q:
-                        self.game_over = True
-                        waiting = False
-                    else:
-                        self.game_state = "setup_num_players"
-                        waiting = False
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mx, my = event.pos
-                    if button_rects["play"].collidepoint(mx, my):
-                        self.game_state = "setup_num_players"
-                        waiting = False
-                    elif button_rects["options"].collidepoint(mx, my):
-                        self.add_message("Options menu coming soon!")
-                    elif button_rects["quit"].collidepoint(mx, my):
-                        self.game_over = True
-                        waiting = False
+                elif event.key == pygame.K_l:
+                    self.load_game()
+                elif event.key == pygame.K_h:
+                    self.leaderboard_pages = [None]
+                    self.leaderboard_rows = None
+                    self.game_state = "leaderboard"
+                else:
+                    self.game_state = "setup_num_players"
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                mx, my = event.pos
+                if button_rects["play"].collidepoint(mx, my):
+                    self.game_state = "setup_num_players"
+                elif button_rects["options"].collidepoint(mx, my):
+                    self.add_message("Options menu coming soon!")
+                elif button_rects["quit"].collidepoint(mx, my):
+                    self.game_over = True
+
     def __init__(self):
+        # __init__ also resets a finished game, so release the old level's pins first
+        if hasattr(self, 'pinned_assets'):
+            self.unpin_level_assets()
+        self.pinned_assets = set()
         self.players = []
         self.dungeon = None
         self.current_player_idx = 0
@@ -425,12 +1040,82 @@ class Game:
         self.turn_order = []
         self.combat_turn_idx = 0
         self.inventory_selection = 0
+        self.turn = 0
+        self.autosave_due = False
+        self.run_seed = random.randrange(2**32)
+        if hasattr(self, 'level_pregen'):
+            # A reset: the last run's upcoming levels will never be taken
+            self.level_pregen.cancel_all()
+        self.level_pregen = LevelPregenerator(build_endless_dungeon if self.ENDLESS else build_dungeon)
+        self.camera = Camera(MAP_AREA, TILE_SIZE)
+        self.map_layer = None
+        self.map_layer_key = None
+        self.map_layer_origin = None
+        self.fov = FieldOfView(FOV_RADIUS)
+        self.hunt_map = None
+        self.forecast = None
+        self.forecast_key = None
+        self.forecast_tally = None
+        self.forecast_action = None
+        self.fog_layer = None
+        self.fog_layer_key = None
+        self.renderer = DirtyRenderer(screen)
+        self.drawn_state = None
+        self.drawn_cells = {}
+        self.clock = FrameScheduler(FPS)
+        self.clock.wait_for_input = True
+        self.perf = PerfMonitor(fps=FPS)
+        # Armed captures and saves still being written carry over when a finished game is reset
+        if not hasattr(self, 'profiler'):
+            self.profiler = ProfileCapture.from_environment()
+        if not hasattr(self, 'saver'):
+            self.saver = SaveWriter(prepare=unpack_evicted_chunks)
+        if not hasattr(self, 'highscores'):
+            self.highscores = HighscoreStore(HIGHSCORE_DB, HIGHSCORE_FILE)
+        self.leaderboard_pages = [None] # The row each page starts after, for paging back
+        self.leaderboard_rows = None
+        self.actions = ActionScheduler()
+        self.enemy_turn_pending = False
+        self.fast_combat = False
+        self.menu_ui = None
 
     def add_message(self, text):
         self.messages.appendleft(text)
 
+    def get_events(self):
+        with self.perf.phase("events"):
+            events = self.clock.events()
+        # The overlay keys work in every state, so they never reach the state's own handling
+        return [event for event in events if not self.handle_perf_key(event)]
+
+    def handle_perf_key(self, event):
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == PERF_OVERLAY_KEY:
+            self.perf.toggle()
+            self.renderer.invalidate()
+            return True
+        if event.key == PERF_DUMP_KEY:
+            if self.perf.samples:
+                self.add_message(f"Saved frame timings to {self.perf.dump_csv()}")
+            else:
+                self.add_message("No frame timings yet; press F3 to start recording.")
+            return True
+        if event.key == PROFILE_FRAMES_KEY:
+            self.profiler.capture_frames(PROFILE_HOTKEY_FRAMES)
+            self.add_message(f"Profiling the next {PROFILE_HOTKEY_FRAMES} frames.")
+            return True
+        if event.key == PROFILE_STATE_KEY:
+            if self.profiler.toggle_state(self.game_state):
+                self.add_message(f"Profiling while in {self.game_state}.")
+            else:
+                self.add_message(f"Stopped profiling {self.game_state}.")
+            return True
+        return False
+
     def draw_text(self, text, x, y, color=WHITE, center=True):
-        text_surface = font.render(text, True, color)
+        self.perf.blits += 1
+        text_surface = render_text(text, FONT_SIZE, color, face=FONT_FACE)
         text_rect = text_surface.get_rect()
         if center:
             text_rect.centerx = x
@@ -440,23 +1125,22 @@ class Game:
             screen.blit(text_surface, (x, y))
 
     def setup_num_players(self):
-        if gold_background:
-            screen.blit(gold_background, (0, 0))
-        else:
-            screen.fill(BLACK)
-        self.draw_text("Enter number of heroes:", SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, color=BLACK)
-
         one_player_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 - 50, "1 Player", button_img, button_img_hover)
         two_players_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 + 10, "2 Players", button_img, button_img_hover)
         three_players_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 + 70, "3 Players", button_img, button_img_hover)
 
-        one_player_button.draw(screen)
-        two_players_button.draw(screen)
-        three_players_button.draw(screen)
-        self.draw_text("--- MESSAGES ---", 820, SCREEN_HEIGHT - 280)
-        pygame.display.flip()
-
-        for event in pygame.event.get():
+        if self.renderer.changed("screen", None, SCREEN_AREA):
+            if gold_background:
+                screen.blit(gold_background, (0, 0))
+            else:
+                screen.fill(BLACK)
+            self.draw_text("Enter number of heroes:", SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, color=BLACK)
+            one_player_button.draw(screen)
+            two_players_button.draw(screen)
+            three_players_button.draw(screen)
+            self.draw_text("--- MESSAGES ---", 820, SCREEN_HEIGHT - 280)
+
+        for event in self.get_events():
             if event.type == pygame.QUIT:
                 self.game_over = True
             if one_player_button.handle_event(event):
@@ -470,18 +1154,18 @@ class Game:
                 self.game_state = "setup_player_name"
 
     def setup_player_name(self):
-        if gold_background:
-            screen.blit(gold_background, (0, 0))
-        else:
-            screen.fill(BLACK)
-        self.draw_text(f"Enter name for hero {self.current_hero_setup}:", SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, color=BLACK)
-        
-        name_panel = gold_panel
-        screen.blit(name_panel, (SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 - 25))
-        self.draw_text(self.player_name, SCREEN_WIDTH // 2 - 85, SCREEN_HEIGHT // 2 - 15, color=BLACK)
+        if self.renderer.changed("screen", (self.current_hero_setup, self.player_name), SCREEN_AREA):
+            if gold_background:
+                screen.blit(gold_background, (0, 0))
+            else:
+                screen.fill(BLACK)
+            self.draw_text(f"Enter name for hero {self.current_hero_setup}:", SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, color=BLACK)
 
-        pygame.display.flip()
-        for event in pygame.event.get():
+            name_panel = gold_panel
+            screen.blit(name_panel, (SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 - 25))
+            self.draw_text(self.player_name, SCREEN_WIDTH // 2 - 85, SCREEN_HEIGHT // 2 - 15, color=BLACK)
+
+        for event in self.get_events():
             if event.type == pygame.QUIT:
                 self.game_over = True
             if event.type == pygame.KEYDOWN:
@@ -493,23 +1177,22 @@ class Game:
                     self.player_name += event.unicode
 
     def setup_player_class(self):
-        if gold_background:
-            screen.blit(gold_background, (0, 0))
-        else:
-            screen.fill(BLACK)
-        self.draw_text(f"Choose class for {self.player_name}:", SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, color=BLACK)
-        self.draw_text("Inventory", SCREEN_WIDTH // 2, 50, color=BLACK)
         warrior_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 - 50, "Warrior", button_img, button_img_hover)
         mage_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 + 10, "Mage", button_img, button_img_hover)
         archer_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2 + 70, "Archer", button_img, button_img_hover)
 
-        warrior_button.draw(screen)
-        mage_button.draw(screen)
-        archer_button.draw(screen)
-
-        pygame.display.flip()
-
-        for event in pygame.event.get():
+        if self.renderer.changed("screen", self.player_name, SCREEN_AREA):
+            if gold_background:
+                screen.blit(gold_background, (0, 0))
+            else:
+                screen.fill(BLACK)
+            self.draw_text(f"Choose class for {self.player_name}:", SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, color=BLACK)
+            self.draw_text("Inventory", SCREEN_WIDTH // 2, 50, color=BLACK)
+            warrior_button.draw(screen)
+            mage_button.draw(screen)
+            archer_button.draw(screen)
+
+        for event in self.get_events():
             if event.type == pygame.QUIT:
                 self.game_over = True
             
@@ -531,53 +1214,301 @@ class Game:
                     self.new_level()
                     self.game_state = "playing"
 
+    def level_seed(self, level):
+        return f"{self.run_seed}:{level}"
+
     def new_level(self):
-        self.dungeon = Dungeon(MAP_WIDTH, MAP_HEIGHT, self.dungeon_level)
-        self.dungeon.generate()
-        start_room = self.dungeon.rooms[0]
+        self.dungeon = self.level_pregen.take(self.dungeon_level, self.level_seed(self.dungeon_level))
+        self.request_next_level()
+        start_x, start_y = self.dungeon.rooms[0].center()
         for player in self.players:
-            player.x, player.y = start_room.center()
+            self.dungeon.place_player(player, start_x, start_y)
+        self.enter_level(start_x, start_y)
         self.add_message(f"You have entered dungeon level {self.dungeon_level}.")
+        if self.perf.enabled:
+            stats = self.level_pregen.stats()
+            self.add_message(f"Levels {stats['pregenerated']}/{stats['levels']} pregenerated, "
+                             f"avg {stats['avg_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+
+    def request_next_level(self):
+        if self.PREGENERATE_LEVELS and (self.ENDLESS or self.dungeon_level < MAX_DUNGEON_LEVEL):
+            next_level = self.dungeon_level + 1
+            self.level_pregen.request(next_level, self.level_seed(next_level))
+
+    def enter_level(self, x, y):
+        # Point the camera, field of view and pinned assets at the current dungeon, with the party around (x, y)
+        self.dungeon.focus(x, y)
+        self.camera.set_world(self.dungeon.width, self.dungeon.height)
+        self.camera.follow(x, y)
+        if screen is not None:
+            self.update_fov()
+        self.pin_level_assets()
+
+    def pin_level_assets(self):
+        # Keep what this level uses resident; the previous level's assets become evictable
+        names = {"sprite:" + tile["sprite"] for tile in TILE_TYPES}
+        names |= {"sprite:" + e.sprite_name for e in self.dungeon.enemies}
+        names |= {"sprite:" + i.sprite_name for i in self.dungeon.items}
+        names |= {"sprite:" + p.sprite_name for p in self.players}
+        names |= {"sound:" + CLASS_SKILL_SOUNDS[p.char_class] for p in self.players}
+        names.add("sound:damage")
+        for name in names:
+            ASSETS.pin(name)
+        self.unpin_level_assets()
+        self.pinned_assets = names
+        ASSETS.evict_to_budget()
+
+    def unpin_level_assets(self):
+        for name in self.pinned_assets:
+            ASSETS.unpin(name)
+        self.pinned_assets = set()
+
+    # --- Saving ---
+    def save_game(self, path=SAVE_FILE):
+        self.saver.save(path, self.snapshot())
+        self.add_message(f"Game saved to {path}.")
+
+    def load_game(self, path=SAVE_FILE):
+        try:
+            snapshot = read_save(path)
+        except FileNotFoundError:
+            self.add_message("There is no saved game.")
+            return False
+        except (OSError, ValueError) as e:
+            self.add_message(f"Could not load {path}: {e}")
+            return False
+        if snapshot["level"]["endless"] != self.ENDLESS:
+            self.add_message("That save is from endless descent; start with --endless to load it."
+                             if snapshot["level"]["endless"] else "That save is not from endless descent.")
+            return False
+        self.restore(snapshot)
+        self.add_message(f"Loaded the game from {path}.")
+        return True
+
+    def snapshot(self):
+        """
+        The run as plain values for save_game: copies only, so it can be
+        written on another thread while play goes on. Items are listed once
+        and referred to by their index in snapshot["items"]. Evicted endless
+        chunks are passed on still compressed, for unpack_evicted_chunks.
+        """
+        items = []
+        item_ids = {}
+
+        def item_id(item):
+            if item is None:
+                return -1
+            if id(item) not in item_ids:
+                item_ids[id(item)] = len(items)
+                items.append(item_record(item))
+            return item_ids[id(item)]
+
+        players = [(p.name, p.char_class, p.x, p.y, p.hp, p.max_hp, p.base_attack, p.base_defense, p.xp, p.level,
+                    p.mana, p.max_mana, p.skill_cooldown, item_id(p.weapon), item_id(p.armor),
+                    [item_id(item) for item in p.inventory]) for p in self.players]
+        dungeon = self.dungeon
+        level = {
+            "seed": dungeon.seed,
+            "width": dungeon.width,
+            "height": dungeon.height,
+            "endless": self.ENDLESS,
+            "chunks_across": getattr(dungeon, "chunks_across", 0),
+            "stairs": dungeon.stairs_down,
+            "rooms": [(r.x1, r.y1, r.x2, r.y2) for r in dungeon.rooms],
+            "tiles": b"",
+            "enemies": [],
+            "floor_items": [],
+            "chunks": [],
+            "explored": (dungeon.explored.count, [(bx, by, bytes(bits)) for (bx, by), bits in dungeon.explored.blocks.items()]),
+        }
+        if self.ENDLESS:
+            # Only chunks that changed are stored; the rest are regenerated from the seed
+            level["chunks"] = [(cx, cy, tiles, [enemy_record(e) for e in enemies], [(item_id(i), i.x, i.y) for i in items])
+                               for cx, cy, tiles, enemies, items in dungeon.changed_chunk_contents()]
+            level["evicted_chunks"] = list(dungeon.saved.items())
+        else:
+            level["tiles"] = bytes(dungeon.tiles)
+            level["enemies"] = [enemy_record(e) for e in dungeon.enemies]
+            level["floor_items"] = [(item_id(i), i.x, i.y) for i in dungeon.items]
+        return {
+            "run_seed": self.run_seed,
+            "dungeon_level": self.dungeon_level,
+            "turn": self.turn,
+            "current_player": self.current_player_idx,
+            "messages": list(self.messages),
+            "items": items,
+            "players": players,
+            "level": level,
+        }
 
-    def main_loop(self):
-        self.draw_text("Game Over", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 150, color=BLACK)
+    def restore(self, snapshot):
+        """Replace the current run with a snapshot's and carry on exploring."""
+        items = [ITEM_KINDS[kind][0](name, value) for kind, name, value in snapshot["items"]]
+        self.players = []
+        for (name, char_class, x, y, hp, max_hp, attack, defense, xp, level, mana, max_mana, cooldown,
+             weapon, armor, inventory) in snapshot["players"]:
+            player = Player(x, y, name, char_class)
+            player.hp, player.max_hp, player.base_attack, player.base_defense = hp, max_hp, attack, defense
+            player.xp, player.level, player.mana, player.max_mana = xp, level, mana, max_mana
+            player.skill_cooldown = cooldown
+            player.weapon = items[weapon] if weapon >= 0 else None
+            player.armor = items[armor] if armor >= 0 else None
+            player.inventory = [items[i] for i in inventory]
+            self.players.append(player)
+        self.num_players = len(self.players)
+        self.run_seed = snapshot["run_seed"]
+        self.dungeon_level = snapshot["dungeon_level"]
+        self.turn = snapshot["turn"]
+        self.current_player_idx = snapshot["current_player"]
+        self.messages = deque(snapshot["messages"], maxlen=self.messages.maxlen)
+
+        saved = snapshot["level"]
+        if saved["endless"]:
+            dungeon = ChunkedDungeon(self.dungeon_level, saved["seed"], saved["chunks_across"])
+            for cx, cy, tiles, enemy_records, floor_items in saved["chunks"]:
+                # Detached until the chunk loads, so each enemy carries its own cooldown and aggro until then
+                enemies = [Enemy.restored(*record) for record in enemy_records]
+                chunk_items = []
+                for index, x, y in floor_items:
+                    item = items[index]
+                    item.x, item.y = x, y
+                    chunk_items.append(item)
+                dungeon.restore_chunk(cx, cy, tiles, enemies, chunk_items)
+        else:
+            dungeon = Dungeon(saved["width"], saved["height"], self.dungeon_level, saved["seed"])
+            dungeon.tiles[:] = saved["tiles"]
+            dungeon.rooms = [Rect(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in saved["rooms"]]
+            dungeon.stairs_down = saved["stairs"]
+            # Thousands of enemies load as whole columns rather than one add_enemy() at a time
+            records = saved["enemies"]
+            kinds, xs, ys, hp, cooldowns, aggro = zip(*records) if records else ((),) * 6
+            dungeon.enemies = list(map(Enemy.restored, kinds, xs, ys, hp))
+            dungeon.enemy_batch.attach_all(dungeon.enemies, xs, ys, hp, cooldowns, bytes(aggro))
+            dungeon.enemy_index.add_all(dungeon.enemies, zip(xs, ys))
+            for index, x, y in saved["floor_items"]:
+                dungeon.add_item(items[index], x, y)
+        count, blocks = saved["explored"]
+        dungeon.explored.blocks = {(bx, by): bytearray(bits) for bx, by, bits in blocks}
+        dungeon.explored.count = count
+        dungeon.revision += 1
+        self.dungeon = dungeon
+
+        self.level_pregen.cancel_all()
+        self.request_next_level()
+        for player in self.players:
+            dungeon.place_player(player, player.x, player.y)
+            dungeon.focus(player.x, player.y)
+        active = self.players[self.current_player_idx]
+        self.enter_level(active.x, active.y)
+        self.hunt_map = None
+        self.forecast_key = None
+        self.autosave_due = False
+        self.game_state = "playing"
+        self.renderer.invalidate()
+
+    def start_music(self):
+        if any(name == "audio" for name, _ in pending_phases):
+            return # Starts once the deferred audio phase has run
         try:
             pygame.mixer.music.play(-1)
         except pygame.error:
             self.add_message("Could not play music.")
 
+    def main_loop(self, profile_startup=False):
+        self.draw_text("Game Over", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 150, color=BLACK)
+        self.start_music()
+
+        first_frame = True
         while not self.game_over:
-            if self.game_state == "main_menu":
-                self.main_menu()
-            elif self.game_state == "setup_num_players":
-                self.setup_num_players()
-            elif self.game_state == "setup_player_name":
-                self.setup_player_name()
-            elif self.game_state == "setup_player_class":
-                self.setup_player_class()
-            elif self.game_state == "playing":
-                self.run_game()
-            elif self.game_state == "combat":
-                self.run_combat()
-            elif self.game_state == "inventory":
-                self.run_inventory()
-            elif self.game_state == "game_over":
-                self.game_over_screen()
-            elif self.game_state == "game_won":
-                self.game_won_screen()
-            elif self.game_state == "leaderboard":
-                self.leaderboard_screen()
+            if self.profiler.armed:
+                written = self.profiler.frame(self.game_state)
+                if written:
+                    self.add_message(f"Saved profile to {written}")
+            self.actions.run_due()
+            if self.game_state != self.drawn_state:
+                self.renderer.invalidate()
+                self.drawn_state = self.game_state
+            with self.perf.phase("update"):
+                if self.game_state == "main_menu":
+                    self.main_menu()
+                elif self.game_state == "setup_num_players":
+                    self.setup_num_players()
+                elif self.game_state == "setup_player_name":
+                    self.setup_player_name()
+                elif self.game_state == "setup_player_class":
+                    self.setup_player_class()
+                elif self.game_state == "playing":
+                    self.run_game()
+                elif self.game_state == "combat":
+                    self.run_combat()
+                elif self.game_state == "inventory":
+                    self.run_inventory()
+                elif self.game_state == "game_over":
+                    self.game_over_screen()
+                elif self.game_state == "game_won":
+                    self.game_won_screen()
+                elif self.game_state == "leaderboard":
+                    self.leaderboard_screen()
+            if self.perf.enabled:
+                with self.perf.phase("overlay"):
+                    self.renderer.mark(self.perf.draw(screen, MAP_AREA.topleft))
+            with self.perf.phase("flip"):
+                self.renderer.present()
+            if first_frame:
+                first_frame = False
+                mark_first_frame()
+                if finish_startup():
+                    self.renderer.invalidate()
+                    self.start_music()
+                if profile_startup:
+                    print(startup_report())
+            with self.perf.phase("idle"):
+                # Sleep until input arrives, but wake in time for the next scheduled action
+                timeout = None
+                delay = self.actions.time_until_next()
+                if delay is not None:
+                    timeout = min(self.clock.idle_timeout_ms, delay * 1000)
+                self.clock.wait(timeout)
+                self.clock.tick()
+            if self.perf.enabled:
+                self.perf.end_frame(self.game_state)
+        written = self.profiler.stop()
+        if written:
+            print(f"Saved profile to {written}")
+        self.saver.wait()
+        self.highscores.close()
 
     def run_game(self):
-        for event in pygame.event.get():
+        for event in self.get_events():
             if event.type == pygame.QUIT:
                 self.game_over = True
             if event.type == pygame.KEYDOWN:
                 self.handle_input(event.key)
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.handle_click(event.pos)
         self.draw_game()
 
+    def handle_click(self, pos):
+        # A click on the map takes the active hero one step along the shortest known route to that cell
+        cell = self.camera.screen_to_world(*pos)
+        explored = self.dungeon.explored
+        if cell is None or not explored.is_explored(*cell):
+            return
+        player = self.players[self.current_player_idx]
+        known = lambda x, y: explored.is_explored(x, y) and self.dungeon.is_walkable(x, y)
+        path = astar((player.x, player.y), cell, known, self.dungeon.width, self.dungeon.height, CLICK_ROUTE_NODES)
+        if path:
+            self.handle_input(STEP_KEYS[(path[0][0] - player.x, path[0][1] - player.y)])
+
     def handle_input(self, key):
+        if key == SAVE_KEY:
+            self.save_game()
+            return
+        if key == LOAD_KEY:
+            self.load_game()
+            return
         player = self.players[self.current_player_idx]
+        level = self.dungeon_level
         if key == pygame.K_w:
             self.move_player(player, 'w')
         elif key == pygame.K_s:
@@ -589,7 +1520,19 @@ class Game:
         elif key == pygame.K_i:
             self.game_state = "inventory"
             self.inventory_selection = 0
+        moved = key in (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d)
+        if moved and self.game_state == "playing":
+            self.move_enemies()
         self.current_player_idx = (self.current_player_idx + 1) % len(self.players)
+        if moved:
+            self.turn += 1
+            if self.dungeon_level != level or self.turn % AUTOSAVE_TURNS == 0:
+                self.autosave_due = True
+        # A save due while a fight is on waits until the party is exploring again
+        if self.autosave_due and self.game_state == "playing":
+            self.autosave_due = False
+            if self.AUTOSAVE:
+                self.saver.save(SAVE_FILE, self.snapshot())
 
     def move_player(self, player, direction):
         dx, dy = 0, 0
@@ -604,49 +1547,223 @@ class Game:
             self.add_message("You can't move off the map.")
             return
 
-        if self.dungeon.grid[new_y][new_x] == SPRITES["stairs"]:
+        tile = self.dungeon.tile_at(new_x, new_y)
+        if tile == TILE_STAIRS:
             self.dungeon_level += 1
             self.new_level()
             return
 
-        if self.dungeon.grid[new_y][new_x] == SPRITES["floor"]:
-            enemies_in_pos = [e for e in self.dungeon.enemies if e.x == new_x and e.y == new_y]
+        if WALKABLE[tile]:
+            enemies_in_pos = self.dungeon.enemies_at(new_x, new_y)
             if enemies_in_pos:
                 self.start_combat(enemies_in_pos)
             else:
-                player.x = new_x
-                player.y = new_y
-                for item in list(self.dungeon.items):
-                    if item.x == new_x and item.y == new_y:
-                        player.inventory.append(item)
-                        self.dungeon.items.remove(item)
-                        self.add_message(f"{player.name} picked up a {item.name}.")
+                self.dungeon.move_player(player, new_x, new_y)
+                self.dungeon.focus(new_x, new_y)
+                for item in self.dungeon.items_at(new_x, new_y):
+                    player.inventory.append(item)
+                    self.dungeon.remove_item(item)
+                    self.add_message(f"{player.name} picked up a {item.name}.")
         else:
             self.add_message("You can't move there.")
 
+    def move_enemies(self):
+        # One batched pass over the level's enemy arrays, stepping down the shared distance-to-party map
+        goals = [(p.x, p.y) for p in self.players if p.is_alive()]
+        if not goals:
+            return
+        batch = self.dungeon.enemy_batch
+        xs, ys = [x for x, _ in goals], [y for _, y in goals]
+        # Walking distance is never shorter than the straight-line steps, so an enemy that is calm
+        # and farther than AGGRO_RANGE that way can't act this turn. While nobody on the level is
+        # aggressive (most turns) only the smaller box around the party can hold one that might.
+        aggro, bxs, bys = batch.aggro, batch.xs, batch.ys
+        hunting = any(aggro)
+        reach = HUNT_RANGE if hunting else AGGRO_RANGE
+        nearby = self.dungeon.enemy_index.in_rect(min(xs) - reach, min(ys) - reach,
+                                                  max(xs) + reach + 1, max(ys) + reach + 1)
+        if not any(aggro[e.slot] or min(abs(bxs[e.slot] - x) + abs(bys[e.slot] - y) for x, y in goals) <= AGGRO_RANGE
+                   for e in nearby):
+            if hunting:
+                batch.calm_all()
+            return # Nobody to move, so the map can wait until someone is
+        if self.hunt_map is None or self.hunt_map.dungeon is not self.dungeon:
+            self.hunt_map = DistanceMap(self.dungeon, HUNT_RANGE)
+        self.hunt_map.update(goals)
+
+        # The field reaches one cell past the hunt range so every hunter's neighbours are on it
+        x0, y0 = min(xs) - HUNT_RANGE - 1, min(ys) - HUNT_RANGE - 1
+        width, height = max(xs) - x0 + HUNT_RANGE + 2, max(ys) - y0 + HUNT_RANGE + 2
+        field = self.hunt_map.to_grid(x0, y0, width, height)
+        moves, attacker = plan_turn(batch, field, x0, y0, width, height, AGGRO_RANGE)
+        if attacker is not None:
+            enemy = batch.enemies[attacker]
+            self.add_message(f"A {enemy.name} attacks!")
+            self.start_combat(self.dungeon.enemies_at(enemy.x, enemy.y))
+            return
+        for slot, x, y in moves:
+            self.dungeon.move_enemy(batch.enemies[slot], x, y)
+
+    def paint_map_layer(self, x1, y1, x2, y2):
+        # Redraw world cells x1 <= x < x2, y1 <= y < y2 of the layer; unexplored cells stay black
+        cam = self.camera
+        explored = self.dungeon.explored
+        area = pygame.Rect((x1 - cam.x) * TILE_SIZE, (y1 - cam.y) * TILE_SIZE, (x2 - x1) * TILE_SIZE, (y2 - y1) * TILE_SIZE)
+        self.map_layer.fill(BLACK, area)
+        for y in range(max(y1, 0), min(y2, self.dungeon.height)):
+            for x in range(max(x1, 0), min(x2, self.dungeon.width)):
+                if not explored.is_explored(x, y):
+                    continue
+                sprite = SPRITES[TILE_TYPES[self.dungeon.tile_at(x, y)]["sprite"]]
+                self.map_layer.blit(sprite, ((x - cam.x) * TILE_SIZE, (y - cam.y) * TILE_SIZE))
+
+    def update_map_layer(self):
+        # Bake the tiles under the camera into one viewport-sized surface so a frame is a single blit
+        cam = self.camera
+        key = (id(self.dungeon), self.dungeon.revision, cam.x, cam.y)
+        if key == self.map_layer_key:
+            return
+        if self.map_layer is None:
+            self.map_layer = pygame.Surface((cam.cols * TILE_SIZE, cam.rows * TILE_SIZE)).convert()
+        same_tiles = self.map_layer_key is not None and self.map_layer_key[:2] == key[:2]
+        dx = cam.x - self.map_layer_origin[0] if same_tiles else 0
+        dy = cam.y - self.map_layer_origin[1] if same_tiles else 0
+        if same_tiles and abs(dx) < cam.cols and abs(dy) < cam.rows:
+            # Small camera move: shift what is already drawn and paint only the exposed edges
+            self.map_layer.scroll(-dx * TILE_SIZE, -dy * TILE_SIZE)
+            if dx > 0:
+                self.paint_map_layer(cam.x + cam.cols - dx, cam.y, cam.x + cam.cols, cam.y + cam.rows)
+            elif dx < 0:
+                self.paint_map_layer(cam.x, cam.y, cam.x - dx, cam.y + cam.rows)
+            if dy > 0:
+                self.paint_map_layer(cam.x, cam.y + cam.rows - dy, cam.x + cam.cols, cam.y + cam.rows)
+            elif dy < 0:
+                self.paint_map_layer(cam.x, cam.y, cam.x + cam.cols, cam.y - dy)
+        else:
+            self.paint_map_layer(cam.x, cam.y, cam.x + cam.cols, cam.y + cam.rows)
+        self.map_layer_key = key
+        self.map_layer_origin = (cam.x, cam.y)
+
+    def update_fov(self):
+        # Shadowcasting only reruns for party members who moved; newly explored cells are painted in place
+        newly_explored = self.fov.update(self.dungeon, [p for p in self.players if p.is_alive()])
+        self.update_map_layer()
+        for x, y in newly_explored:
+            if self.camera.is_visible(x, y):
+                self.paint_map_layer(x, y, x + 1, y + 1)
+
+    def update_fog_layer(self):
+        # Darken explored cells the party can't currently see
+        cam = self.camera
+        key = (self.fov.key, cam.x, cam.y)
+        if key == self.fog_layer_key:
+            return
+        if self.fog_layer is None:
+            self.fog_layer = pygame.Surface((cam.cols * TILE_SIZE, cam.rows * TILE_SIZE), pygame.SRCALPHA)
+        self.fog_layer.fill((0, 0, 0, FOG_ALPHA))
+        x1, y1, x2, y2 = cam.visible_cells()
+        for x, y in self.fov.visible:
+            if x1 <= x < x2 and y1 <= y < y2:
+                self.fog_layer.fill((0, 0, 0, 0), ((x - cam.x) * TILE_SIZE, (y - cam.y) * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        self.fog_layer_key = key
+
+    def visible_entities(self):
+        # Only what the camera can see, in drawing order: items, enemies, then players on top.
+        # Items and enemies outside the party's field of view stay hidden.
+        x1, y1, x2, y2 = self.camera.visible_cells()
+        seen = self.fov.visible
+        return ([e for e in self.dungeon.item_index.in_rect(x1, y1, x2, y2) if (e.x, e.y) in seen]
+                + [e for e in self.dungeon.enemy_index.in_rect(x1, y1, x2, y2) if (e.x, e.y) in seen]
+                + self.dungeon.player_index.in_rect(x1, y1, x2, y2))
+
+    def draw_map(self):
+        with self.perf.phase("draw"):
+            self.update_fov()
+            self.update_fog_layer()
+            screen.set_clip(MAP_AREA)
+            screen.blit(self.map_layer, MAP_AREA.topleft)
+            screen.blit(self.fog_layer, MAP_AREA.topleft)
+            entities = self.visible_entities()
+            for entity in entities:
+                screen.blit(entity.sprite, self.camera.world_to_screen(entity.x, entity.y))
+            screen.set_clip(None)
+            self.perf.blits += 2 + len(entities)
+
+    def mark_map_changes(self):
+        # Dirty only the tiles whose entities changed since the last frame
+        active = self.players[self.current_player_idx]
+        self.camera.follow(active.x, active.y)
+        self.update_fov()
+        cells = {}
+        for entity in self.visible_entities():
+            cells.setdefault((entity.x, entity.y), []).append(entity.sprite_name)
+        previous, self.drawn_cells = self.drawn_cells, cells
+        if self.renderer.changed("map", (self.map_layer_key, self.fov.key), MAP_AREA):
+            return
+        for (x, y) in previous.keys() | cells.keys():
+            if previous.get((x, y)) != cells.get((x, y)):
+                self.renderer.mark(self.camera.cell_rect(x, y))
+
+    def update_forecast(self):
+        # Predict the fight with the enemy next to the active hero; only start over when someone involved changed
+        active = self.players[self.current_player_idx]
+        enemies = []
+        for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            enemies = [e for e in self.dungeon.enemies_at(active.x + dx, active.y + dy) if e.is_alive()]
+            if enemies:
+                break
+        key = (tuple((p.hp, p.mana, p.skill_cooldown, p.attack, p.defense) for p in self.players),
+               tuple((id(e), e.hp) for e in enemies))
+        if key == self.forecast_key:
+            return
+        self.forecast_key = key
+        self.forecast = None
+        if self.forecast_action is not None:
+            self.actions.cancel(self.forecast_action)
+            self.forecast_action = None
+        if enemies:
+            self.forecast_tally = [0, 0.0, 0.0] # fights, wins, HP lost
+            self.refine_forecast(key, enemies)
+
+    def refine_forecast(self, key, enemies):
+        # One batch of fights per frame, so the forecast never holds a frame up; it sharpens as batches add up
+        self.forecast_action = None
+        if key != self.forecast_key:
+            return
+        tally = self.forecast_tally
+        prediction = predict_combat(self.players, enemies, trials=FORECAST_BATCH, seed=tally[0])
+        if prediction is None:
+            return
+        trials = prediction["trials"]
+        tally[0] += trials
+        tally[1] += prediction["win"] * trials
+        tally[2] += prediction["hp_loss"] * trials
+        self.forecast = (enemies[0].name, round(tally[1] / tally[0], 2), round(tally[2] / tally[0]))
+        # Without NumPy the predictor plays fewer fights than asked, and that is all it has time for
+        if trials == FORECAST_BATCH and tally[0] < PREDICTION_TRIALS:
+            self.forecast_action = self.actions.schedule(0, self.refine_forecast, key, enemies)
+
     def draw_game(self):
+        party = tuple((p.name, p.level, p.hp, p.max_hp, p.mana, p.max_mana) for p in self.players)
+        self.mark_map_changes()
+        self.update_forecast()
+        self.renderer.changed("party", (party, self.current_player_idx, self.forecast), PARTY_AREA)
+        self.renderer.changed("messages", tuple(self.messages), MESSAGE_AREA)
+        if not self.renderer.dirty:
+            return
+
         screen.fill(BLACK)
-        # Draw map
-        for y in range(self.dungeon.height):
-            for x in range(self.dungeon.width):
-                screen.blit(self.dungeon.grid[y][x], (x * TILE_SIZE, y * TILE_SIZE))
-
-        # Draw items, enemies, players
-        for item in self.dungeon.items:
-            screen.blit(item.sprite, (item.x * TILE_SIZE, item.y * TILE_SIZE))
-        for enemy in self.dungeon.enemies:
-            screen.blit(enemy.sprite, (enemy.x * TILE_SIZE, enemy.y * TILE_SIZE))
-        for player in self.players:
-            screen.blit(player.sprite, (player.x * TILE_SIZE, player.y * TILE_SIZE))
+        self.draw_map()
 
         # Draw UI
-        self.draw_ui()
-        pygame.display.flip()
+        with self.perf.phase("ui"):
+            self.draw_ui()
 
     def draw_ui(self):
         # Draw UI panel
         if ui_panel_background:
             screen.blit(ui_panel_background, (800, 0))
+            self.perf.blits += 1
         else:
             pygame.draw.rect(screen, (40, 40, 40), (800, 0, SCREEN_WIDTH - 800, SCREEN_HEIGHT))
 
@@ -673,6 +1790,12 @@ class Game:
 
             y += 100
 
+        # Odds of the fight the active hero is about to start
+        if self.forecast:
+            name, win, hp_loss = self.forecast
+            color = GREEN if win >= 0.9 else YELLOW if win >= 0.5 else RED
+            self.draw_text(f'vs {name}: {win:.0%} win, ~{hp_loss} HP lost', 820, y, color=color, center=False)
+
         # Draw messages
         y = SCREEN_HEIGHT - 280
         self.draw_text("--- MESSAGES ---", 820, y)
@@ -690,39 +1813,49 @@ class Game:
         self.add_message("You've entered combat!")
 
     def run_combat(self):
-        screen.fill(BLACK)
-        # Draw map view on the left
-        for y in range(self.dungeon.height):
-            for x in range(self.dungeon.width):
-                screen.blit(self.dungeon.grid[y][x], (x * TILE_SIZE, y * TILE_SIZE))
-        for item in self.dungeon.items:
-            screen.blit(item.sprite, (item.x * TILE_SIZE, item.y * TILE_SIZE))
-        for enemy in self.dungeon.enemies:
-            screen.blit(enemy.sprite, (enemy.x * TILE_SIZE, enemy.y * TILE_SIZE))
-        for player in self.players:
-            screen.blit(player.sprite, (player.x * TILE_SIZE, player.y * TILE_SIZE))
-
-        self.draw_combat_screen()
         entity = self.turn_order[self.combat_turn_idx]
+        combatants = tuple((c.name, c.hp) for c in self.turn_order)
+        self.mark_map_changes()
+        self.renderer.changed("party", (combatants, self.combat_turn_idx), PARTY_AREA)
+        self.renderer.changed("messages", tuple(self.messages), MESSAGE_AREA)
+        if self.renderer.dirty:
+            screen.fill(BLACK)
+            # Draw map view on the left
+            self.draw_map()
+            with self.perf.phase("ui"):
+                self.draw_combat_screen()
 
         if isinstance(entity, Player):
             attack_button = Button(SCREEN_WIDTH - 250, SCREEN_HEIGHT - 120, "Attack", button_img, button_img_hover)
             skill_button = Button(SCREEN_WIDTH - 250, SCREEN_HEIGHT - 60, "Skill", button_img, button_img_hover)
 
-            attack_button.draw(screen)
-            skill_button.draw(screen)
+            if self.renderer.dirty:
+                attack_button.draw(screen)
+                skill_button.draw(screen)
 
-            for event in pygame.event.get():
+            for event in self.get_events():
                 if event.type == pygame.QUIT:
                     self.game_over = True
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                    self.toggle_fast_combat()
                 if attack_button.handle_event(event):
                     self.player_attack()
                 if skill_button.handle_event(event):
                     self.use_skill(entity, self.combat_enemies)
         else: # Enemy turn
-            pygame.time.wait(500) # Pause for enemy turn
-            self.enemy_attack(entity)
+            if not self.enemy_turn_pending:
+                self.enemy_turn_pending = True
+                delay = 0 if self.fast_combat else ENEMY_TURN_DELAY
+                self.actions.schedule(delay, self.take_enemy_turn, entity)
+            for event in self.get_events():
+                if event.type == pygame.QUIT:
+                    self.game_over = True
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                    self.toggle_fast_combat()
+
+        self.check_combat_end()
 
+    def check_combat_end(self):
         if not any(p.is_alive() for p in self.players):
             self.add_message("Your party has been defeated. Game Over.")
             self.update_highscores()
@@ -730,7 +1863,7 @@ class Game:
         elif not any(e.is_alive() for e in self.combat_enemies):
             if any(e.name == 'Dragon' for e in self.combat_enemies):
                 self.add_message("Congratulations! You have defeated the Dragon and won the game!")
-                self.update_highscores()
+                self.update_highscores(won=True)
                 self.game_state = "game_won"
             else:
                 self.add_message("You won the battle!")
@@ -741,9 +1874,8 @@ class Game:
                 if p.is_alive():
                     msg = p.gain_xp(xp_per_player)
                     if msg: self.add_message(msg)
-            self.dungeon.enemies = [e for e in self.dungeon.enemies if e not in self.combat_enemies]
-
-        pygame.display.flip()
+            for e in self.combat_enemies:
+                self.dungeon.remove_enemy(e)
 
     def player_attack(self):
         player = self.turn_order[self.combat_turn_idx]
@@ -755,6 +1887,15 @@ class Game:
             self.add_message(f"{player.name} hits {target.name} for {damage} damage.")
         self.next_turn()
 
+    def take_enemy_turn(self, enemy):
+        self.enemy_turn_pending = False
+        if self.game_state == "combat":
+            self.enemy_attack(enemy)
+
+    def toggle_fast_combat(self):
+        self.fast_combat = not self.fast_combat
+        self.add_message(f"Fast combat {'on' if self.fast_combat else 'off'}.")
+
     def enemy_attack(self, enemy):
         alive_players = [p for p in self.players if p.is_alive()]
         if alive_players:
@@ -774,6 +1915,7 @@ class Game:
         # Draw UI panel
         if ui_panel_background:
             screen.blit(ui_panel_background, (800, 0))
+            self.perf.blits += 1
         else:
             pygame.draw.rect(screen, (40, 40, 40), (800, 0, SCREEN_WIDTH - 800, SCREEN_HEIGHT))
 
@@ -808,9 +1950,12 @@ class Game:
             if player.skill_cooldown > 0:
                 self.add_message(f"Power Strike is on cooldown for {player.skill_cooldown} more turns.")
                 return
-            if sword_sound:
-                sword_sound.play()
-            target = random.choice([e for e in enemies if e.is_alive()])
+            play_sound("sword")
+            alive_enemies = [e for e in enemies if e.is_alive()]
+            if not alive_enemies:
+                self.add_message("There are no enemies to strike.")
+                return
+            target = random.choice(alive_enemies)
             damage = player.attack * 2
             target.take_damage(damage)
             self.add_message(f"{player.name} uses Power Strike on {target.name} for {damage} damage!")
@@ -819,8 +1964,7 @@ class Game:
             if player.mana < 10:
                 self.add_message("Not enough mana for Fireball.")
                 return
-            if magic_sound:
-                magic_sound.play()
+            play_sound("magic")
             self.add_message(f"{player.name} casts Fireball!")
             for enemy in enemies:
                 if enemy.is_alive():
@@ -832,11 +1976,13 @@ class Game:
             if player.skill_cooldown > 0:
                 self.add_message(f"Double Shot is on cooldown for {player.skill_cooldown} more turns.")
                 return
-            if arrow_sound:
-                arrow_sound.play()
+            play_sound("arrow")
             self.add_message(f"{player.name} uses Double Shot!")
             for _ in range(2):
-                target = random.choice([e for e in enemies if e.is_alive()])
+                alive_enemies = [e for e in enemies if e.is_alive()]
+                if not alive_enemies:
+                    break
+                target = random.choice(alive_enemies)
                 damage = player.attack
                 target.take_damage(damage)
                 self.add_message(f"{player.name} shoots {target.name} for {damage} damage.")
@@ -845,7 +1991,7 @@ class Game:
 
     def run_inventory(self):
         player = self.players[self.current_player_idx]
-        for event in pygame.event.get():
+        for event in self.get_events():
             if event.type == pygame.QUIT:
                 self.game_over = True
             if event.type == pygame.KEYDOWN:
@@ -878,6 +2024,11 @@ class Game:
         self.draw_inventory_screen()
 
     def draw_inventory_screen(self):
+        player = self.players[self.current_player_idx]
+        contents = (id(player), id(player.weapon), id(player.armor), tuple(id(i) for i in player.inventory))
+        if not self.renderer.changed("screen", (contents, self.inventory_selection), SCREEN_AREA):
+            return
+
         if gold_background:
             screen.blit(gold_background, (0,0))
         else:
@@ -886,8 +2037,6 @@ class Game:
         self.draw_text("Inventory", SCREEN_WIDTH // 2 - 100, 50, color=BLACK)
         self.draw_text("Press 'i' or 'ESC' to close", SCREEN_WIDTH // 2 - 200, 100, color=BLACK)
 
-        player = self.players[self.current_player_idx]
-
         # Equipped items section
         self.draw_text("Equipped", 200, 200, color=BLACK)
         weapon_slot = gold_panel
@@ -918,101 +2067,91 @@ class Game:
                 if i == self.inventory_selection:
                     pygame.draw.rect(screen, YELLOW, (x, y, item_slot.get_width(), item_slot.get_height()), 3)
 
-        pygame.display.flip()
-
     def game_over_screen(self):
-        if gold_background:
-            screen.blit(gold_background, (0, 0))
-        else:
-            screen.fill(BLACK)
-        self.draw_text("Game Over", SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 150, color=BLACK)
-
         menu_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2, "Main Menu", button_img, button_img_hover)
-        menu_button.draw(screen)
-
-        pygame.display.flip()
+        if self.renderer.changed("screen", None, SCREEN_AREA):
+            if gold_background:
+                screen.blit(gold_background, (0, 0))
+            else:
+                screen.fill(BLACK)
+            self.draw_text("Game Over", SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 150, color=BLACK)
+            menu_button.draw(screen)
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game_over = True
-                    waiting = False
-                if menu_button.handle_event(event):
-                    self.__init__()
-                    waiting = False
+        for event in self.get_events():
+            if event.type == pygame.QUIT:
+                self.game_over = True
+            if menu_button.handle_event(event):
+                self.__init__()
+                break
 
     def game_won_screen(self):
-        if gold_background:
-            screen.blit(gold_background, (0, 0))
-        else:
-            screen.fill(BLACK)
-        self.draw_text("You Win!", SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 150, color=BLACK)
-
         menu_button = Button(SCREEN_WIDTH // 2 - 95, SCREEN_HEIGHT // 2, "Main Menu", button_img, button_img_hover)
-        menu_button.draw(screen)
+        if self.renderer.changed("screen", None, SCREEN_AREA):
+            if gold_background:
+                screen.blit(gold_background, (0, 0))
+            else:
+                screen.fill(BLACK)
+            self.draw_text("You Win!", SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 150, color=BLACK)
+            menu_button.draw(screen)
 
-        pygame.display.flip()
+        for event in self.get_events():
+            if event.type == pygame.QUIT:
+                self.game_over = True
+            if menu_button.handle_event(event):
+                self.__init__()
+                break
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game_over = True
-                    waiting = False
-                if menu_button.handle_event(event):
-                    self.__init__()
-                    waiting = False
-
-    def update_highscores(self):
-        scores = []
-        if os.path.exists(HIGHSCORE_FILE):
+    def update_highscores(self, won=False):
+        try:
+            self.highscores.submit(", ".join(p.name for p in self.players), [p.char_class for p in self.players],
+                                   self.dungeon_level, sum(p.xp for p in self.players), won)
+        except sqlite3.Error as e:
+            print(f"Warning: could not save the highscore: {e}")
+
+    def leaderboard_screen(self):
+        if self.leaderboard_rows is None:
             try:
-                with open(HIGHSCORE_FILE, 'r') as f:
-                    scores = json.load(f)
-            except json.JSONDecodeError:
-                scores = []
-        
-        total_xp = sum(p.xp for p in self.players)
-        party_names = ", ".join([p.name for p in self.players])
-        scores.append({"party": party_names, "level": self.dungeon_level, "xp": total_xp})
-        
-        scores = sorted(scores, key=lambda x: (x['level'], x['xp']), reverse=True)[:10]
+                self.leaderboard_rows = self.highscores.top(LEADERBOARD_PAGE, after=self.leaderboard_pages[-1])
+            except sqlite3.Error as e:
+                print(f"Warning: could not read the highscores: {e}")
+                self.leaderboard_rows = []
+        page = len(self.leaderboard_pages) - 1
+        if self.renderer.changed("screen", (page, tuple(score["id"] for score in self.leaderboard_rows)), SCREEN_AREA):
+            screen.fill(BLACK)
+            self.draw_text("Leaderboard", SCREEN_WIDTH // 2 - 100, 50)
 
-        with open(HIGHSCORE_FILE, 'w') as f:
-            json.dump(scores, f, indent=4)
+            y = 150
+            for i, score in enumerate(self.leaderboard_rows):
+                self.draw_text(f"{page * LEADERBOARD_PAGE + i + 1}. {score['party']} - Level: {score['level']}, XP: {score['xp']}", 100, y, center=False)
+                y += 40
 
-    def leaderboard_screen(self):
-        screen.fill(BLACK)
-        self.draw_text("Leaderboard", SCREEN_WIDTH // 2 - 100, 50)
+            self.draw_text("LEFT/RIGHT to turn the page, ESC to return to the main menu", 100, SCREEN_HEIGHT - 100, center=False)
 
-        scores = []
-        if os.path.exists(HIGHSCORE_FILE):
-            try:
-                with open(HIGHSCORE_FILE, 'r') as f:
-                    scores = json.load(f)
-            except json.JSONDecodeError:
-                scores = []
-
-        y = 150
-        for i, score in enumerate(scores):
-            self.draw_text(f"{i+1}. {score['party']} - Level: {score['level']}, XP: {score['xp']}", 100, y)
-            y += 40
-
-        self.draw_text("Press ESC to return to the main menu", 100, SCREEN_HEIGHT - 100)
-        pygame.display.flip()
-
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game_over = True
-                    waiting = False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.game_state = "main_menu"
-                        waiting = False
+        for event in self.get_events():
+            if event.type == pygame.QUIT:
+                self.game_over = True
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.game_state = "main_menu"
+                elif event.key == pygame.K_RIGHT and len(self.leaderboard_rows) == LEADERBOARD_PAGE:
+                    self.leaderboard_pages.append(self.leaderboard_rows[-1])
+                    self.leaderboard_rows = None
+                elif event.key == pygame.K_LEFT and page > 0:
+                    self.leaderboard_pages.pop()
+                    self.leaderboard_rows = None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Python RPG Adventure")
+    parser.add_argument("--endless", action="store_true", help="endless descent: streamed levels that never run out")
+    parser.add_argument("--profile-startup", action="store_true", help="print wall time per startup phase after the first frame")
+    parser.add_argument("--defer", type=deferred_phases_arg, default=",".join(DEFAULT_DEFERRED_PHASES),
+                        help="comma-separated startup phases to run after the first frame (default: %(default)s, '' for none)")
+    parser.add_argument("--load", metavar="SAVE", help="continue the run saved in this file")
+    args = parser.parse_args()
+    print("--- RUNNING PYGAME VERSION ---")
+    startup(defer=args.defer)
+    Game.ENDLESS = args.endless
     game = Game()
-    game.main_loop()
\ No newline at end of file
+    if args.load:
+        game.load_game(args.load)
+    game.main_loop(profile_startup=args.profile_startup)
\ No newline at end of file
@@ -0,0 +1,256 @@
+import itertools
+import os
+import struct
+import threading
+import zlib
+
+from workers import get_executor
+
+SAVE_MAGIC = b"RPGS"
+SAVE_VERSION = 1
+# Magic, format version, CRC-32 of the compressed body, and the body's length once decompressed
+HEADER = struct.Struct("<4sHII")
+COUNT = struct.Struct("<I")
+SHORT = struct.Struct("<H")
+# Records refer to strings by their index in the save's string table
+GAME = struct.Struct("<Iiii")              # run seed, dungeon level, turn, current player
+ITEM = struct.Struct("<BHi")               # kind, name, value
+PLAYER = struct.Struct("<HH13i")           # name, class, x, y, hp, max hp, attack, defense, xp, level,
+                                           # mana, max mana, skill cooldown, weapon item, armor item
+LEVEL = struct.Struct("<HiiBiBii")         # seed, width, height, endless, chunks across, has stairs, stairs x, y
+ROOM = struct.Struct("<iiii")
+ENEMY = struct.Struct("<HiiiiB")           # type, x, y, hp, cooldown, aggro
+FLOOR_ITEM = struct.Struct("<iii")         # item, x, y
+CHUNK = struct.Struct("<ii")
+EXPLORED_BLOCK = struct.Struct("<ii")      # followed by the block's bits
+
+
+class Packer:
+    """Builds a save body from fixed-layout records, storing each string once in a table."""
+
+    def __init__(self):
+        self.body = bytearray()
+        self.strings = {}
+
+    def string(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def pack(self, layout, *values):
+        self.body += layout.pack(*values)
+
+    def records(self, layout, rows):
+        self.body += COUNT.pack(len(rows))
+        self.body += b"".join(itertools.starmap(layout.pack, rows))
+
+    def blob(self, data):
+        self.body += COUNT.pack(len(data))
+        self.body += data
+
+    def finish(self):
+        table = bytearray(COUNT.pack(len(self.strings)))
+        for text in self.strings:
+            data = text.encode("utf-8")
+            table += SHORT.pack(len(data))
+            table += data
+        return bytes(table + self.body)
+
+
+class Unpacker:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+        self.strings = [str(self.take(self.unpack(SHORT)[0]), "utf-8") for _ in range(self.unpack(COUNT)[0])]
+
+    def take(self, size):
+        if self.offset + size > len(self.data):
+            raise ValueError("save file is truncated")
+        start, self.offset = self.offset, self.offset + size
+        return self.data[start:self.offset]
+
+    def unpack(self, layout):
+        return layout.unpack(self.take(layout.size))
+
+    def records(self, layout):
+        count = self.unpack(COUNT)[0]
+        return list(layout.iter_unpack(self.take(count * layout.size)))
+
+    def blob(self):
+        return bytes(self.take(self.unpack(COUNT)[0]))
+
+
+# --- Encoding ---
+def pack_enemies(packer, enemies):
+    packer.records(ENEMY, [(packer.string(kind), x, y, hp, cooldown, aggro)
+                           for kind, x, y, hp, cooldown, aggro in enemies])
+
+
+def unpack_enemies(unpacker):
+    strings = unpacker.strings
+    return [(strings[kind], x, y, hp, cooldown, aggro) for kind, x, y, hp, cooldown, aggro in unpacker.records(ENEMY)]
+
+
+def encode_snapshot(snapshot):
+    """
+    Pack a snapshot (see Game.snapshot) into the save format: a small
+    header, then a zlib-compressed body of the string table and records.
+    """
+    packer = Packer()
+    packer.pack(GAME, snapshot["run_seed"], snapshot["dungeon_level"], snapshot["turn"], snapshot["current_player"])
+    packer.records(SHORT, [(packer.string(message),) for message in snapshot["messages"]])
+    packer.records(ITEM, [(kind, packer.string(name), value) for kind, name, value in snapshot["items"]])
+    players = snapshot["players"]
+    packer.records(PLAYER, [(packer.string(p[0]), packer.string(p[1])) + tuple(p[2:15]) for p in players])
+    for player in players:
+        packer.blob(struct.pack(f"<{len(player[15])}i", *player[15]))
+
+    level = snapshot["level"]
+    stairs = level["stairs"]
+    packer.pack(LEVEL, packer.string(level["seed"]), level["width"], level["height"], level["endless"],
+                level["chunks_across"], stairs is not None, *(stairs or (0, 0)))
+    packer.records(ROOM, level["rooms"])
+    packer.blob(level["tiles"])
+    pack_enemies(packer, level["enemies"])
+    packer.records(FLOOR_ITEM, level["floor_items"])
+    packer.body += COUNT.pack(len(level["chunks"]))
+    for cx, cy, tiles, enemies, floor_items in level["chunks"]:
+        packer.pack(CHUNK, cx, cy)
+        packer.blob(tiles)
+        pack_enemies(packer, enemies)
+        packer.records(FLOOR_ITEM, floor_items)
+    count, blocks = level["explored"]
+    block_bytes = len(blocks[0][2]) if blocks else 0
+    packer.pack(struct.Struct("<II"), count, block_bytes)
+    packer.records(struct.Struct(f"<ii{block_bytes}s"), blocks)
+
+    body = packer.finish()
+    compressed = zlib.compress(body)
+    return HEADER.pack(SAVE_MAGIC, SAVE_VERSION, zlib.crc32(compressed), len(body)) + compressed
+
+
+def decode_snapshot(data):
+    """Unpack save file contents back into a snapshot. Raises ValueError if they aren't a readable save."""
+    if len(data) < HEADER.size:
+        raise ValueError("not a save file")
+    magic, version, crc, length = HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise ValueError("not a save file")
+    if version != SAVE_VERSION:
+        raise ValueError(f"save format version {version} is not supported (expected {SAVE_VERSION})")
+    compressed = memoryview(data)[HEADER.size:]
+    if zlib.crc32(compressed) != crc:
+        raise ValueError("save file is damaged")
+    try:
+        body = zlib.decompress(compressed)
+        if len(body) != length:
+            raise ValueError("save file is damaged")
+        return unpack_body(Unpacker(body))
+    except (zlib.error, struct.error, UnicodeDecodeError, IndexError) as e:
+        raise ValueError(f"save file is damaged: {e}")
+
+
+def unpack_body(unpacker):
+    strings = unpacker.strings
+    run_seed, dungeon_level, turn, current_player = unpacker.unpack(GAME)
+    messages = [strings[index] for index, in unpacker.records(SHORT)]
+    items = [(kind, strings[name], value) for kind, name, value in unpacker.records(ITEM)]
+    players = []
+    for record in unpacker.records(PLAYER):
+        inventory = unpacker.blob()
+        players.append((strings[record[0]], strings[record[1]]) + record[2:]
+                       + (list(struct.unpack(f"<{len(inventory) // 4}i", inventory)),))
+
+    seed, width, height, endless, chunks_across, has_stairs, stairs_x, stairs_y = unpacker.unpack(LEVEL)
+    level = {
+        "seed": strings[seed],
+        "width": width,
+        "height": height,
+        "endless": bool(endless),
+        "chunks_across": chunks_across,
+        "stairs": (stairs_x, stairs_y) if has_stairs else None,
+        "rooms": unpacker.records(ROOM),
+        "tiles": unpacker.blob(),
+        "enemies": unpack_enemies(unpacker),
+        "floor_items": unpacker.records(FLOOR_ITEM),
+        "chunks": [],
+    }
+    for _ in range(unpacker.unpack(COUNT)[0]):
+        cx, cy = unpacker.unpack(CHUNK)
+        level["chunks"].append((cx, cy, unpacker.blob(), unpack_enemies(unpacker), unpacker.records(FLOOR_ITEM)))
+    count, block_bytes = unpacker.unpack(struct.Struct("<II"))
+    level["explored"] = (count, unpacker.records(struct.Struct(f"<ii{block_bytes}s")))
+    return {
+        "run_seed": run_seed,
+        "dungeon_level": dungeon_level,
+        "turn": turn,
+        "current_player": current_player,
+        "messages": messages,
+        "items": items,
+        "players": players,
+        "level": level,
+    }
+
+
+# --- Files ---
+def write_atomic(path, data):
+    """Write data to path so that a crash mid-write never leaves a half-written file there."""
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def read_save(path):
+    with open(path, "rb") as f:
+        return decode_snapshot(f.read())
+
+
+class SaveWriter:
+    """
+    Encodes and writes saves on a worker thread, so the frame never waits
+    on disk. Only the newest snapshot waiting to be written is kept: a
+    save made while the previous one is still being written replaces any
+    other that was queued behind it. If given, prepare(snapshot) runs on
+    the worker before encoding, for snapshot work too slow for a frame.
+    """
+
+    def __init__(self, prepare=None):
+        self.prepare = prepare
+        self.lock = threading.Lock()
+        self.queued = None
+        self.future = None
+        self.saves = 0
+
+    def save(self, path, snapshot):
+        with self.lock:
+            self.queued = (path, snapshot)
+            if self.future is None:
+                # Its own single worker, which keeps saves in the order they were made
+                self.future = get_executor("save").submit(self.drain)
+
+    def drain(self):
+        while True:
+            with self.lock:
+                job, self.queued = self.queued, None
+                if job is None:
+                    self.future = None
+                    return
+            path, snapshot = job
+            if self.prepare is not None:
+                self.prepare(snapshot)
+            try:
+                write_atomic(path, encode_snapshot(snapshot))
+                self.saves += 1
+            except OSError as e:
+                print(f"Warning: could not save the game to {path}: {e}")
+
+    def wait(self):
+        """Block until every queued save is on disk."""
+        with self.lock:
+            future = self.future
+        if future is not None:
+            future.result()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Headless simulation: plays complete games with a scripted or random policy
+as fast as possible, with no window, audio or sprites.
+
+    python simulate.py --games 1000 --policy scripted --players 3 --seed 1
+"""
+import argparse
+import os
+import random
+import time
+from collections import deque
+
+os.environ.setdefault("RPG_HEADLESS", "1")
+
+import pygame
+import rpg_pygame as rpg
+from pathfinding import astar
+
+DIRECTIONS = {'w': (0, -1), 's': (0, 1), 'a': (-1, 0), 'd': (1, 0)}
+DIRECTION_KEYS = {'w': pygame.K_w, 's': pygame.K_s, 'a': pygame.K_a, 'd': pygame.K_d}
+STEP_KEYS = {step: key for key, step in DIRECTIONS.items()}
+
+
+class SimulatedGame(rpg.Game):
+    """A Game that never touches the highscore or save files or starts worker threads."""
+
+    PREGENERATE_LEVELS = False
+    AUTOSAVE = False
+
+    def update_highscores(self, won=False):
+        pass
+
+
+def skill_ready(player):
+    if player.char_class == "mage":
+        return player.mana >= 10
+    return player.skill_cooldown == 0
+
+
+class RandomPolicy:
+    """Wanders in random directions and picks attack or skill at random."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose_move(self, game, player):
+        return self.rng.choice("wasd")
+
+    def use_skill(self, game, player):
+        return skill_ready(player) and self.rng.random() < 0.5
+
+
+class ScriptedPolicy:
+    """Walks the shortest path to the nearest enemy or item, then to the stairs."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        # Per player: (dungeon, target, remaining steps as (key, x, y))
+        self.routes = {}
+
+    def choose_move(self, game, player):
+        dungeon = game.dungeon
+        targets = {(e.x, e.y) for e in dungeon.enemies} | {(i.x, i.y) for i in dungeon.items}
+        if not targets and dungeon.stairs_down:
+            targets = {dungeon.stairs_down}
+
+        # Keep following the last route while it is still valid
+        route = self.routes.get(id(player))
+        if route and route[0] is dungeon and route[1] in targets and route[2]:
+            key, x, y = route[2][0]
+            if (player.x + DIRECTIONS[key][0], player.y + DIRECTIONS[key][1]) == (x, y):
+                route[2].pop(0)
+                return key
+
+        if len(targets) == 1:
+            # A single goal, usually the stairs: A* heads for it instead of flooding the level
+            found = self.find_path(dungeon, (player.x, player.y), next(iter(targets)))
+        else:
+            found = self.find_route(dungeon, (player.x, player.y), targets)
+        if not found:
+            return self.rng.choice("wasd")
+        target, steps = found
+        self.routes[id(player)] = (dungeon, target, steps[1:])
+        return steps[0][0]
+
+    def find_route(self, dungeon, start, targets):
+        # Breadth-first search over walkable tiles to the nearest target
+        queue = deque([start])
+        came_from = {start: None}
+        is_walkable = dungeon.is_walkable
+        width, height = dungeon.width, dungeon.height
+        popleft, append = queue.popleft, queue.append
+        while queue:
+            cell = popleft()
+            if cell in targets and cell != start:
+                target = cell
+                steps = []
+                while came_from[cell] is not None:
+                    key, previous = came_from[cell]
+                    steps.append((key, cell[0], cell[1]))
+                    cell = previous
+                steps.reverse()
+                return target, steps
+            x, y = cell
+            for key, nx, ny in (('w', x, y - 1), ('s', x, y + 1), ('a', x - 1, y), ('d', x + 1, y)):
+                if (nx, ny) in came_from or not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                if not is_walkable(nx, ny):
+                    continue
+                came_from[(nx, ny)] = (key, cell)
+                append((nx, ny))
+        return None
+
+    def find_path(self, dungeon, start, goal):
+        path = astar(start, goal, dungeon.is_walkable, dungeon.width, dungeon.height)
+        if not path:
+            return None
+        steps = []
+        x, y = start
+        for nx, ny in path:
+            steps.append((STEP_KEYS[(nx - x, ny - y)], nx, ny))
+            x, y = nx, ny
+        return goal, steps
+
+    def use_skill(self, game, player):
+        return skill_ready(player)
+
+
+POLICIES = {"random": RandomPolicy, "scripted": ScriptedPolicy}
+
+
+def play_combat(game, policy):
+    while game.game_state == "combat":
+        entity = game.turn_order[game.combat_turn_idx]
+        if isinstance(entity, rpg.Player):
+            if policy.use_skill(game, entity):
+                game.use_skill(entity, game.combat_enemies)
+            else:
+                game.player_attack()
+        else:
+            game.enemy_attack(entity)
+        game.check_combat_end()
+
+
+def run_game(seed, classes, policy_name="scripted", max_turns=2000):
+    """
+    Play one game to the end and return a summary dict. The same seed,
+    classes and policy always give the same result.
+    """
+    rpg.startup()
+    random.seed(seed)
+    rng = random.Random(seed)
+    policy = POLICIES[policy_name](rng)
+    game = SimulatedGame()
+    for i, char_class in enumerate(classes):
+        game.players.append(rpg.Player(0, 0, f"Hero {i + 1}", char_class))
+    game.num_players = len(classes)
+    game.new_level()
+    game.game_state = "playing"
+
+    levels = [{"level": 1, "turn": 0, "xp": 0, "party_levels": [1] * len(classes)}]
+    turns = 0
+    while game.game_state == "playing" and turns < max_turns:
+        player = game.players[game.current_player_idx]
+        game.handle_input(DIRECTION_KEYS[policy.choose_move(game, player)])
+        turns += 1
+        if game.game_state == "combat":
+            play_combat(game, policy)
+        elif game.game_state == "inventory":
+            game.game_state = "playing"
+        if game.dungeon_level != levels[-1]["level"]:
+            levels.append({"level": game.dungeon_level, "turn": turns, "xp": sum(p.xp for p in game.players),
+                           "party_levels": [p.level for p in game.players]})
+
+    outcome = {"game_won": "won", "game_over": "dead"}.get(game.game_state, "timeout")
+    return {
+        "seed": seed,
+        "classes": list(classes),
+        "policy": policy_name,
+        "outcome": outcome,
+        "level": game.dungeon_level,
+        "turns": turns,
+        "levels": levels,
+        "party_levels": [p.level for p in game.players],
+        "xp": sum(p.xp for p in game.players),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless RPG games as fast as possible.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="scripted")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    class_rng = random.Random(args.seed)
+    outcomes = {"won": 0, "dead": 0, "timeout": 0}
+    level_total = 0
+    start = time.perf_counter()
+    for i in range(args.games):
+        classes = [class_rng.choice(list(rpg.CLASSES)) for _ in range(args.players)]
+        result = run_game(args.seed + i, classes, args.policy, args.max_turns)
+        outcomes[result["outcome"]] += 1
+        level_total += result["level"]
+    elapsed = time.perf_counter() - start
+
+    print(f"Played {args.games} games ({args.policy} policy) in {elapsed:.2f}s "
+          f"({args.games / elapsed * 60:.0f} games/min)")
+    print(f"Won: {outcomes['won']}  Died: {outcomes['dead']}  Timed out: {outcomes['timeout']}")
+    print(f"Average level reached: {level_total / max(1, args.games):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+class SpatialIndex:
+    """
+    Maps grid cells to the entities standing on them, so "who is at (x, y)"
+    is a dict lookup instead of a scan over every entity on the level.
+    Entities must be moved through the index to keep it in sync.
+    """
+
+    def __init__(self):
+        self.cells = {}
+        self.count = 0
+
+    def add(self, entity):
+        self.cells.setdefault((entity.x, entity.y), []).append(entity)
+        self.count += 1
+
+    def add_all(self, entities, positions):
+        """Add entities known to stand at positions, without reading each one's x and y."""
+        cells = self.cells
+        for entity, key in zip(entities, positions):
+            cells.setdefault(key, []).append(entity)
+        self.count += len(entities)
+
+    def remove(self, entity):
+        key = (entity.x, entity.y)
+        occupants = self.cells.get(key)
+        if not occupants or entity not in occupants:
+            return False
+        occupants.remove(entity)
+        if not occupants:
+            del self.cells[key]
+        self.count -= 1
+        return True
+
+    def move(self, entity, x, y):
+        self.remove(entity)
+        entity.x = x
+        entity.y = y
+        self.add(entity)
+
+    def at(self, x, y):
+        return list(self.cells.get((x, y), ()))
+
+    def in_rect(self, x1, y1, x2, y2):
+        """Entities with x1 <= x < x2 and y1 <= y < y2."""
+        found = []
+        if (x2 - x1) * (y2 - y1) <= len(self.cells):
+            for y in range(y1, y2):
+                for x in range(x1, x2):
+                    found.extend(self.cells.get((x, y), ()))
+        else:
+            # Fewer occupied cells than cells in the area: walk the occupied ones
+            for (x, y), occupants in self.cells.items():
+                if x1 <= x < x2 and y1 <= y < y2:
+                    found.extend(occupants)
+        return found
+
+    def within(self, x, y, radius):
+        """Entities within `radius` cells of (x, y), measured as a square (Chebyshev) distance."""
+        return self.in_rect(x - radius, y - radius, x + radius + 1, y + radius + 1)
+
+    def clear(self):
+        self.cells.clear()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
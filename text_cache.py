@@ -0,0 +1,76 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """
+    Shared text rendering: a pool of Font objects keyed by (face, size) and
+    a bounded LRU of rendered surfaces keyed by (font, text, color, antialias).
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, face, size):
+        """Return the pooled font for (face, size), creating it on first use."""
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(face, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        return {
+            "fonts": len(self.fonts),
+            "entries": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Process-wide cache shared by the game and the menu UI
+_cache = TextCache()
+
+
+def get_font(face, size):
+    return _cache.font(face, size)
+
+
+def render_text(text, size, color, antialias=True, face=None):
+    """Render text with the pooled (face, size) font, reusing cached surfaces."""
+    return _cache.render(_cache.font(face, size), text, color, antialias)
+
+
+def render_with_font(font, text, color, antialias=True):
+    """Like render_text, for callers that already hold a font object."""
+    return _cache.render(font, text, color, antialias)
+
+
+def text_cache_stats():
+    return _cache.stats()
@@ -1,6 +1,6 @@
 import os
-import pygame
 from golden_ui_loader import load_ui_elements
+from text_cache import render_text, render_with_font
 
 class UIManager:
     def __init__(self, screen, font, screen_width, screen_height):
@@ -43,13 +43,12 @@ class UIManager:
             icon_rect = icon_img.get_rect()
             icon_rect.center = (x + 30, y + button_img.get_height() // 2)
             self.screen.blit(icon_img, icon_rect)
-        text_surface = self.font.render(text, True, (255, 255, 255))
+        text_surface = render_with_font(self.font, text, (255, 255, 255))
         text_rect = text_surface.get_rect(midleft=(x + 60, y + button_img.get_height() // 2 if button_img else y + 25))
         self.screen.blit(text_surface, text_rect)
 
     def draw_text(self, text, x, y, size=48, color=(255,255,255), center=True):
-        font = pygame.font.Font(None, size)
-        text_surface = font.render(text, True, color)
+        text_surface = render_text(text, size, color)
         text_rect = text_surface.get_rect()
         if center:
             text_rect.center = (x, y)
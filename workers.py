@@ -0,0 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by every Game instance: one single-thread executor per kind of background work,
+# so a slow save never holds up the next level (levels are small, so one worker is plenty)
+_executors = {}
+
+
+def get_executor(name):
+    executor = _executors.get(name)
+    if executor is None:
+        executor = _executors[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+    return executor